@@ -0,0 +1,169 @@
+# flake8: noqa: E402
+# benchmarks/bench_pipeline.py
+import os
+import sys
+
+# Add the repository root (one level up) to sys.path so the benchmark runs without an editable install.
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+from src.comments import CommentStore
+from src.data_processor import aggregate_by_lesson
+from src.parser import parse_feedback
+from src.synthetic import generate_feedback_page
+from src.views import (
+    build_course_display_map,
+    filter_courses,
+    prepare_comments_view,
+    sort_course_display_names,
+)
+from src.visualization import plot_stacked_bar, sort_and_label_lessons
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def scenario(num_cards: int) -> dict:
+    """Course/lesson layout for a benchmark size: roughly 1,000 lessons per course, at least 8 courses."""
+    num_courses = max(8, num_cards // 1000)
+    return {"num_cards": num_cards, "num_courses": num_courses, "max_comments_per_card": 3, "seed": num_cards}
+
+
+def time_call(func, repeat: int) -> list:
+    """Run func repeat times and return the wall-clock seconds of each run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def prepare_app_data(parsed_df, agg_df, store):
+    """Mirror the data preparation the Streamlit app does on each rerun for the first course."""
+    filtered = filter_courses(agg_df)
+    display_map = build_course_display_map(filtered)
+    sort_course_display_names(list(display_map.values()))
+    course = next(iter(display_map))
+    return prepare_comments_view(parsed_df, filtered, course, "chronological", store)
+
+
+def plot_course(agg_df, course):
+    plot_stacked_bar(agg_df, course, output_filename=None, mode="chronological")
+    plt.close("all")
+
+
+def run_size(num_cards: int, repeat: int) -> list:
+    """Benchmark every pipeline stage on a synthetic page with num_cards cards."""
+    html = generate_feedback_page(**scenario(num_cards))
+    parsed_df = parse_feedback(html)
+    agg_df = aggregate_by_lesson(parsed_df)
+    course = agg_df["course"].iloc[0]
+    course_df = agg_df[agg_df["course"] == course]
+    # The app reads cards back from CSV, where they reference their comments in the comment store by id.
+    store = CommentStore()
+    csv_parsed_df = store.intern(parsed_df)
+
+    cases = {
+        "parse_feedback": lambda: parse_feedback(html),
+        "aggregate_by_lesson": lambda: aggregate_by_lesson(parsed_df),
+        "sort_and_label_lessons": lambda: sort_and_label_lessons(course_df, mode="worst-to-best"),
+        "plot_stacked_bar": lambda: plot_course(agg_df, course),
+        "app_prepare": lambda: prepare_app_data(csv_parsed_df, agg_df, store),
+    }
+    results = []
+    for name, func in cases.items():
+        timings = time_call(func, repeat)
+        results.append(
+            {
+                "benchmark": name,
+                "cards": num_cards,
+                "html_bytes": len(html.encode("utf-8")),
+                "seconds": timings,
+                "best": min(timings),
+                "mean": statistics.mean(timings),
+            }
+        )
+        print(f"{name:<24} {num_cards:>8} cards  best {min(timings):9.4f}s  mean {statistics.mean(timings):9.4f}s")
+    return results
+
+
+def git_commit() -> str:
+    """Return the short hash of the current commit, or "unknown" outside a git checkout."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline_path: str, candidate_path: str):
+    """Print the ratio of best times between two result files (values above 1.0 mean the candidate is slower)."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(candidate_path, "r", encoding="utf-8") as f:
+        candidate = json.load(f)
+    base_times = {(r["benchmark"], r["cards"]): r["best"] for r in baseline["results"]}
+    print(f"{'benchmark':<24} {'cards':>8} {baseline['commit']:>10} {candidate['commit']:>10}  ratio")
+    for r in candidate["results"]:
+        key = (r["benchmark"], r["cards"])
+        if key not in base_times:
+            continue
+        ratio = r["best"] / base_times[key] if base_times[key] else float("inf")
+        print(f"{r['benchmark']:<24} {r['cards']:>8} {base_times[key]:>9.4f}s {r['best']:>9.4f}s  {ratio:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the feedback pipeline on synthetic pages.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Card counts to benchmark (default: 1k 10k 100k)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (default: 3)")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="Compare two results files instead of running"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = git_commit()
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.repeat))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    payload = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
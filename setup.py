@@ -4,4 +4,9 @@ setup(
     name="sp_feedback",
     version="0.1.0",
     packages=find_packages(),
+    entry_points={
+        "console_scripts": [
+            "sp-feedback=src.cli:main",
+        ],
+    },
 )
@@ -0,0 +1,144 @@
+# src/alerts.py
+
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import file_size, track_stage
+
+# Columns identifying a lesson in the aggregated data, and the labels reported with each alert.
+LESSON_KEYS = ["course_id", "lesson_id", "chapter_num", "section_num", "item_num"]
+LESSON_LABELS = ["course", "lesson_title"]
+
+# Two-sided p < 0.001. Every lesson in every course is tested at once, so a looser threshold
+# would raise false alarms on every refresh.
+ALERT_Z_THRESHOLD = 3.29
+
+ALERT_COLUMNS = (
+    LESSON_KEYS
+    + LESSON_LABELS
+    + [
+        "previous_responses",
+        "previous_no_pct",
+        "new_responses",
+        "new_no_pct",
+        "current_responses",
+        "current_no_pct",
+        "change_pct",
+        "z_score",
+        "direction",
+    ]
+)
+
+
+def detect_alerts(
+    previous_df: pd.DataFrame, current_df: pd.DataFrame, z_threshold: float = ALERT_Z_THRESHOLD
+) -> pd.DataFrame:
+    """
+    Flag lessons whose "no" rate changed significantly between two aggregates.
+
+    Aggregated counts are cumulative, so the current counts include every previous response. For lessons
+    present in both, the responses that came in since (current minus previous) are compared with the
+    previous ones in a pooled two-proportion z-test, computed for all lessons in one vectorized pass.
+    Lessons without new responses are skipped. Returns the flagged lessons sorted by the size of the jump.
+    """
+    counts = ["yes_count", "no_count"]
+    merged = pd.merge(
+        previous_df[LESSON_KEYS + counts],
+        current_df[LESSON_KEYS + LESSON_LABELS + counts],
+        on=LESSON_KEYS,
+        suffixes=("_prev", "_cur"),
+    )
+    n_prev = (merged["yes_count_prev"] + merged["no_count_prev"]).to_numpy(dtype=float)
+    n_cur = (merged["yes_count_cur"] + merged["no_count_cur"]).to_numpy(dtype=float)
+    no_prev = merged["no_count_prev"].to_numpy(dtype=float)
+    no_cur = merged["no_count_cur"].to_numpy(dtype=float)
+    n_new = n_cur - n_prev
+    no_new = no_cur - no_prev
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_prev = no_prev / n_prev
+        p_new = no_new / n_new
+        # The previous and new responses pooled together are exactly the current ones.
+        p_cur = no_cur / n_cur
+        se = np.sqrt(p_cur * (1 - p_cur) * (1 / n_prev + 1 / n_new))
+        z = (p_new - p_prev) / se
+    # No previous responses, or an identical all-yes/all-no rate, leaves nothing to test.
+    z = np.where(np.isfinite(z), z, 0.0)
+
+    alerts = merged[LESSON_KEYS + LESSON_LABELS].copy()
+    alerts["previous_responses"] = n_prev.astype(int)
+    alerts["previous_no_pct"] = p_prev * 100
+    alerts["new_responses"] = n_new.astype(int)
+    alerts["new_no_pct"] = p_new * 100
+    alerts["current_responses"] = n_cur.astype(int)
+    alerts["current_no_pct"] = p_cur * 100
+    alerts["change_pct"] = (p_new - p_prev) * 100
+    alerts["z_score"] = z
+    alerts["direction"] = np.where(z > 0, "worse", "better")
+
+    # Counts that stayed the same (or went down, after a data reset) have no new responses to test.
+    has_new = (n_new > 0) & (no_new >= 0) & (no_new <= n_new)
+    alerts = alerts[has_new & (np.abs(z) >= z_threshold)]
+    return alerts.reindex(alerts["change_pct"].abs().sort_values(ascending=False).index)[ALERT_COLUMNS]
+
+
+def alerts_file(previous_csv: str, current_csv: str, output_csv: str, z_threshold: Optional[float] = None):
+    """
+    Compare two aggregated CSVs and write the alerts to output_csv, recording "alerts" stage metrics.
+    Without a previous aggregate (or with one written before lesson ids existed) there is nothing to compare,
+    and an empty alerts file is written.
+    """
+    with track_stage("alerts") as metrics:
+        current_df = pd.read_csv(current_csv)
+        metrics.bytes_read = file_size(current_csv)
+        previous_df = None
+        if os.path.exists(previous_csv):
+            previous_df = pd.read_csv(previous_csv)
+            metrics.bytes_read += file_size(previous_csv)
+        if previous_df is not None and set(LESSON_KEYS) <= set(previous_df.columns):
+            alerts = detect_alerts(previous_df, current_df, z_threshold or ALERT_Z_THRESHOLD)
+        else:
+            alerts = pd.DataFrame(columns=ALERT_COLUMNS)
+        metrics.rows = len(current_df)
+
+        alerts.to_csv(output_csv, index=False)
+        metrics.bytes_written = file_size(output_csv)
+    return alerts
+
+
+def main():
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    parser = argparse.ArgumentParser(description="Flag significant changes in lesson 'no' rates between aggregates.")
+    parser.add_argument(
+        "--previous",
+        type=str,
+        default=os.path.join(data_dir, "aggregated_feedback_previous.csv"),
+        help="Previous aggregate (default: data/aggregated_feedback_previous.csv)",
+    )
+    parser.add_argument(
+        "--current",
+        type=str,
+        default=os.path.join(data_dir, "aggregated_feedback.csv"),
+        help="Current aggregate (default: data/aggregated_feedback.csv)",
+    )
+    parser.add_argument(
+        "--output", type=str, default=os.path.join(data_dir, "alerts.csv"), help="Output CSV (default: data/alerts.csv)"
+    )
+    parser.add_argument(
+        "--z",
+        type=float,
+        default=ALERT_Z_THRESHOLD,
+        help=f"|z| needed to raise an alert (default: {ALERT_Z_THRESHOLD})",
+    )
+    args = parser.parse_args()
+
+    alerts = alerts_file(args.previous, args.current, args.output, args.z)
+    print(f"{len(alerts)} alert(s) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# src/api.py
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from src.comments import CommentStore, read_parsed_feedback, store_path
+from src.data_processor import read_lesson_csv
+from src.parser import text_id
+from src.views import clean_course_name, prepare_comments_view
+from src.visualization import SORT_MODES, sort_and_label_lessons
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class CachedResponse:
+    """A JSON body with its ETag and a lazily built gzip copy, which has an ETag of its own."""
+
+    def __init__(self, status: int, payload):
+        self.status = status
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+        self._gzipped = None
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+    def etag_for(self, gzipped: bool) -> str:
+        """Strong validators must differ between encodings of the same data, so the gzip copy gets a suffix."""
+        return self.etag[:-1] + '-gz"' if gzipped else self.etag
+
+
+class FeedbackService:
+    """
+    Answers the read-only queries over the aggregated (and, if available, parsed) feedback data.
+
+    The data is loaded once; every distinct response is built on first request and then served from memory.
+    Parsed cards reference their comments by id, resolved through store (without one, parsed_df holds
+    stringified comment lists).
+    """
+
+    def __init__(
+        self, agg_df: pd.DataFrame, parsed_df: Optional[pd.DataFrame] = None, store: Optional[CommentStore] = None
+    ):
+        self.agg_df = agg_df
+        self.parsed_df = parsed_df
+        self.store = store
+        # Accept either the full course name or the display name used by the app; both resolve to the course id.
+        self.course_names = {text_id(course): course for course in agg_df["course"].unique()}
+        self.courses = {}
+        for course_id, course in self.course_names.items():
+            self.courses[course] = course_id
+            self.courses.setdefault(clean_course_name(course), course_id)
+        self._cache: Dict[Tuple[str, str], CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_data_dir(cls, data_dir: str = DATA_DIR) -> "FeedbackService":
+        agg_df = read_lesson_csv(os.path.join(data_dir, "aggregated_feedback.csv"))
+        parsed_path = os.path.join(data_dir, "parsed_feedback.csv")
+        if not os.path.exists(parsed_path):
+            return cls(agg_df)
+        comments_path = store_path(parsed_path)
+        store = CommentStore.load(comments_path) if os.path.exists(comments_path) else None
+        return cls(agg_df, read_parsed_feedback(parsed_path), store)
+
+    def get(self, path: str, query: str = "") -> CachedResponse:
+        """Return the (cached) response for a request path and query string."""
+        mode = parse_qs(query).get("mode", ["chronological"])[0]
+        try:
+            key, build = self._route(path, mode)
+        except NotFound as e:
+            return CachedResponse(404, {"error": str(e)})
+        except BadRequest as e:
+            return CachedResponse(400, {"error": str(e)})
+
+        # Responses are cached under a canonical key, so the cache holds at most one entry per endpoint.
+        response = self._cache.get(key)
+        if response is None:
+            response = CachedResponse(200, build())
+            with self._lock:
+                response = self._cache.setdefault(key, response)
+        return response
+
+    def _route(self, path: str, mode: str) -> Tuple[tuple, Callable[[], dict]]:
+        """Resolve a request to its canonical cache key and the function that builds its payload."""
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["courses"]:
+            return ("courses",), self.course_list
+        if len(parts) == 3 and parts[0] == "courses" and parts[2] in ("lessons", "comments"):
+            course_id = self.courses.get(parts[1])
+            if course_id is None:
+                raise NotFound(f"Unknown course '{parts[1]}'")
+            course = self.course_names[course_id]
+            if mode not in SORT_MODES:
+                raise BadRequest(f"Unknown mode '{mode}'; expected one of {', '.join(SORT_MODES)}")
+            if parts[2] == "lessons":
+                return ("lessons", course_id, mode), lambda: self.lessons(course, mode)
+            if self.parsed_df is None:
+                raise NotFound("Parsed feedback data not found. Please run the pipeline.")
+            return ("comments", course_id, mode), lambda: self.comments(course, mode)
+        raise NotFound(f"No endpoint at '{path}'")
+
+    def course_list(self):
+        summary = (
+            self.agg_df.groupby("course_id")
+            .agg(
+                course=("course", "first"),
+                lessons=("lesson_id", "size"),
+                total_responses=("total_responses", "sum"),
+                yes_count=("yes_count", "sum"),
+                no_count=("no_count", "sum"),
+            )
+            .sort_values("course")
+        )
+        summary.insert(1, "display_name", summary["course"].map(clean_course_name))
+        return {"courses": json.loads(summary.to_json(orient="records"))}
+
+    def lessons(self, course: str, mode: str):
+        course_df = self.agg_df[self.agg_df["course_id"] == text_id(course)]
+        labeled = sort_and_label_lessons(course_df, mode=mode)
+        return {"course": course, "mode": mode, "lessons": json.loads(labeled.to_json(orient="records"))}
+
+    def comments(self, course: str, mode: str):
+        merged = prepare_comments_view(self.parsed_df, self.agg_df, course, mode, self.store)
+        merged = merged[merged["comments"].map(len) > 0]
+        return {"course": course, "mode": mode, "lessons": json.loads(merged.to_json(orient="records"))}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header (a list of entity tags, or "*") matches etag. If-None-Match uses weak
+    comparison, so a W/ prefix on a listed tag is ignored.
+    """
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows a gzip response: gzip (or "*", if gzip isn't listed) with a
+    q-value above 0. "gzip;q=0" explicitly refuses it; an unparsable q-value counts as 0.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qualities[coding.lower()] = q
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+class FeedbackRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive lets a client reuse one connection for many requests.
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle's algorithm stalls each keep-alive reply.
+    disable_nagle_algorithm = True
+    service: FeedbackService = None
+    access_log = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        response = self.service.get(url.path, url.query)
+
+        use_gzip = accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        etag = response.etag_for(use_gzip)
+        if response.status == 200 and etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = response.gzipped if use_gzip else response.body
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "public, max-age=60")
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+def make_server(service: FeedbackService, host: str = "127.0.0.1", port: int = 8000, access_log: bool = False):
+    """Build a threaded HTTP server answering from service (port 0 picks a free port)."""
+    handler = type(
+        "BoundFeedbackRequestHandler", (FeedbackRequestHandler,), {"service": service, "access_log": access_log}
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the aggregated feedback as read-only JSON.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--data-dir", type=str, default=DATA_DIR, help="Directory holding the pipeline CSVs")
+    parser.add_argument("--access-log", action="store_true", help="Log every request to stderr")
+    args = parser.parse_args()
+
+    service = FeedbackService.from_data_dir(args.data_dir)
+    server = make_server(service, args.host, args.port, access_log=args.access_log)
+    print(f"Serving feedback data on http://{args.host}:{server.server_port}/courses")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# src/cli.py
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+import matplotlib.pyplot as plt
+
+from src.data_processor import read_lesson_csv
+from src.ingest import ingest_exports
+from src.metrics import file_size, track_stage
+from src.pipeline import DATA_DIR, MANIFEST_FILENAME, default_stages, run_pipeline
+from src.static_site import export_site
+from src.visualization import SORT_MODES, render_all_courses
+
+# Pipeline stages run by each subcommand; "render", "export", and "ingest" are handled separately since they
+# are not pipeline stages.
+COMMAND_STAGES = {
+    "fetch": ["scrape"],
+    "parse": ["parse"],
+    "aggregate": ["aggregate", "alerts"],
+    "all": None,
+}
+
+
+def render(data_dir: str, output_dir: Optional[str], modes: List[str], jobs: Optional[int]):
+    """Render the charts of every course from the aggregated data, recording "render" stage metrics."""
+    aggregated_csv = os.path.join(data_dir, "aggregated_feedback.csv")
+    output_dir = output_dir or os.path.join(data_dir, "charts")
+    with track_stage("render") as metrics:
+        agg_df = read_lesson_csv(aggregated_csv)
+        metrics.bytes_read = file_size(aggregated_csv)
+        charts = render_all_courses(agg_df, output_dir, modes=modes, jobs=jobs)
+        paths = [path for course_paths in charts.values() for path in course_paths]
+        metrics.rows = len(agg_df)
+        metrics.bytes_written = sum(file_size(path) for path in paths)
+    print(f"Rendered {len(paths)} chart(s) for {len(charts)} course(s) into {output_dir}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="sp-feedback", description="Run the self-paced feedback pipeline without the Streamlit app."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    descriptions = {
+        "fetch": "Scrape the feedback page (opens a browser for login).",
+        "parse": "Parse the saved feedback page into data/parsed_feedback.csv.",
+        "aggregate": "Aggregate parsed feedback by lesson and check for change alerts.",
+        "render": "Render the charts of every course into data/charts/.",
+        "all": "Fetch, parse, aggregate, and render.",
+        "export": "Export a static site with every course's charts and comments into data/site/.",
+        "ingest": "Parse saved exports from previous terms into one deduplicated dataset.",
+    }
+    for command, description in descriptions.items():
+        sub = subparsers.add_parser(command, help=description, description=description)
+        sub.add_argument("--data-dir", type=str, default=DATA_DIR, help="Directory holding the pipeline files")
+        if command == "ingest":
+            sub.add_argument("patterns", nargs="+", help='Glob(s) of saved pages, e.g. "exports/*.html*" (quote them)')
+            sub.add_argument("--output", type=str, help="Merged CSV (default: <data-dir>/parsed_feedback_history.csv)")
+            sub.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (default: 0, every core)")
+            continue
+        if command == "export":
+            sub.add_argument("--output-dir", type=str, help="Where to write the site (default: <data-dir>/site)")
+            sub.add_argument("--force", action="store_true", help="Rebuild every course page, even if unchanged")
+        elif command != "render":
+            sub.add_argument("--force", action="store_true", help="Re-run stages even if their inputs are unchanged")
+        if command in ("render", "all"):
+            sub.add_argument("--output-dir", type=str, help="Where to write charts (default: <data-dir>/charts)")
+        if command in ("render", "all", "export"):
+            sub.add_argument(
+                "--mode", action="append", choices=SORT_MODES, help="Sorting mode to render (repeatable; default: all)"
+            )
+            sub.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (default: 0, every core)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Charts are only ever written to files here, so never try to open a GUI backend.
+    plt.switch_backend("Agg")
+
+    try:
+        if args.command in COMMAND_STAGES:
+            run_pipeline(
+                default_stages(args.data_dir),
+                selected=COMMAND_STAGES[args.command],
+                force=args.force,
+                manifest_path=os.path.join(args.data_dir, MANIFEST_FILENAME),
+            )
+        if args.command == "ingest":
+            output = args.output or os.path.join(args.data_dir, "parsed_feedback_history.csv")
+            ingest_exports(args.patterns, output, jobs=args.jobs or None)
+        if args.command in ("render", "all"):
+            render(args.data_dir, args.output_dir, args.mode or list(SORT_MODES), args.jobs or None)
+        if args.command == "export":
+            export_site(args.data_dir, args.output_dir, args.mode or list(SORT_MODES), args.jobs or None, args.force)
+    except Exception as e:
+        print(f"sp-feedback {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# src/comments.py
+
+import hashlib
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# Column of the parsed data holding each card's comment ids, space-separated.
+COMMENT_IDS_COLUMN = "comment_ids"
+
+
+def normalize_comment(text: str) -> str:
+    """Collapse whitespace and trim, for the text shown for a comment."""
+    return " ".join(text.split())
+
+
+def comment_key(text: str) -> str:
+    """What makes two comments the same: their text casefolded, with whitespace collapsed."""
+    return normalize_comment(text).casefold()
+
+
+def comment_id(text: str) -> int:
+    """
+    Stable id of a comment, derived from a 63-bit hash of its key, so a text gets the same id in every scrape
+    and export (and fits a signed 64-bit column).
+    """
+    digest = hashlib.blake2b(comment_key(text).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def store_path(parsed_csv: str) -> str:
+    """Where the comment store of a parsed CSV lives, e.g. data/parsed_feedback_comments.csv."""
+    base, ext = os.path.splitext(parsed_csv)
+    return f"{base}_comments{ext or '.csv'}"
+
+
+class CommentStore:
+    """
+    Keeps each distinct comment text once, keyed by comment_id: a hash of the casefolded, whitespace-collapsed
+    text, so copies differing only in case or spacing are stored once and cards only reference the id. The
+    first-seen spelling is kept for display.
+    """
+
+    def __init__(self, texts: Optional[Dict[int, str]] = None):
+        self.texts: Dict[int, str] = dict(texts or {})
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, text: str) -> int:
+        """Store a comment (if it is new) and return its id."""
+        key = comment_id(text)
+        self.texts.setdefault(key, normalize_comment(text))
+        return key
+
+    def text(self, key: int) -> str:
+        try:
+            return self.texts[key]
+        except KeyError:
+            raise KeyError(f"Comment id {key} is not in the comment store; was it saved with this parsed CSV?")
+
+    def intern(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replace the comments column (lists of texts) of parsed cards with a comment_ids column in the same
+        position, storing each text here. Returns a new DataFrame.
+        """
+        ids = [" ".join(str(self.add(text)) for text in comments) for comments in df["comments"]]
+        df = df.copy()
+        df.insert(df.columns.get_loc("comments"), COMMENT_IDS_COLUMN, ids)
+        return df.drop(columns="comments")
+
+    def save(self, path: str):
+        pd.DataFrame({"comment_id": list(self.texts), "text": list(self.texts.values())}).to_csv(path, index=False)
+
+    @classmethod
+    def load(cls, path: str) -> "CommentStore":
+        df = pd.read_csv(path, dtype={"comment_id": "int64", "text": str}, keep_default_na=False)
+        return cls({int(key): text for key, text in zip(df["comment_id"], df["text"])})
+
+
+def read_parsed_feedback(path: str) -> pd.DataFrame:
+    """Read a parsed CSV, keeping comment ids as strings (a lone id would otherwise be read as a number)."""
+    return pd.read_csv(path, dtype={COMMENT_IDS_COLUMN: str})
+
+
+def parse_comment_ids(value) -> List[int]:
+    """Comment ids of one card as read back from CSV (a space-separated string, or NaN when it has none)."""
+    return [int(key) for key in value.split()] if isinstance(value, str) else []
+
+
+def count_comment_ids(series: Iterable) -> List[Tuple[int, int]]:
+    """(comment id, number of times it was written) for a series of cards' comment ids, in first-seen order."""
+    counts = Counter()
+    for value in series:
+        counts.update(parse_comment_ids(value))
+    return list(counts.items())
@@ -1,16 +1,96 @@
 # src/data_processor.py
 
+import argparse
 import os
+import re
+from typing import Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from src.metrics import file_size, track_stage
+from src.parser import add_id_columns
+from src.profiling import profile_stage
+
+# z-score of a two-sided 95% confidence interval.
+Z_95 = 1.959963984540054
+
+# Column the lesson ranking is presorted by (descending): the lower bound of the "no" rate interval.
+RANKING_KEY = "no_ci_low"
+
+# Levels of the rollup cube, from the top, and the key column each level adds to its parent's.
+ROLLUP_LEVELS = ["course", "chapter", "section", "lesson"]
+ROLLUP_KEYS = ["course_id", "chapter_num", "section_num", "lesson_id"]
+# Key value of the levels below a cube row (e.g. the section_num of a chapter total).
+ROLLUP_ALL = -1
+
+# Lesson keys of every aggregate-derived CSV (aggregates, alerts); files without them predate integer ids.
+ID_COLUMNS = ["course_id", "lesson_id"]
+
+# Trailing level marker of a course name, e.g. the "1" in "Prealgebra 1" or the "A" in "Algebra A".
+COURSE_LEVEL_REGEX = re.compile(r"\s+(\d+|[A-Z])$")
+
+
+class OutdatedDataError(ValueError):
+    """A pipeline output was written by an older version and has to be regenerated."""
+
+
+def read_lesson_csv(path: str) -> pd.DataFrame:
+    """
+    Read an aggregated (or alerts) CSV. Raises OutdatedDataError if it was written before lessons were keyed
+    on ids: its rows can't be matched to current parsed data, so it has to be regenerated rather than patched.
+    """
+    df = pd.read_csv(path)
+    missing = [column for column in ID_COLUMNS if column not in df.columns]
+    if missing:
+        raise OutdatedDataError(
+            f"{path} was written by an older version (no {', '.join(missing)} column). "
+            "Re-run the pipeline (`sp-feedback all`) to regenerate it."
+        )
+    return df
+
+
+def wilson_interval(successes, totals, z: float = Z_95) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Wilson score interval for a proportion, computed for whole arrays of counts at once.
+
+    Returns (low, high) as fractions in [0, 1]. Rows with no responses get the uninformative interval (0, 1).
+    """
+    successes = np.asarray(successes, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = successes / totals
+        denominator = 1 + z**2 / totals
+        center = (p + z**2 / (2 * totals)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / totals + z**2 / (4 * totals**2)) / denominator
+    empty = totals <= 0
+    low = np.where(empty, 0.0, np.clip(center - margin, 0.0, 1.0))
+    high = np.where(empty, 1.0, np.clip(center + margin, 0.0, 1.0))
+    return low, high
+
+
+def add_no_rate_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add no_pct and its 95% Wilson interval (no_ci_low, no_ci_high), all in percent, from yes_count/no_count.
+    Modifies and returns df.
+    """
+    total_counts = df["yes_count"] + df["no_count"]
+    df["no_pct"] = (df["no_count"] / total_counts) * 100
+    low, high = wilson_interval(df["no_count"], total_counts)
+    df["no_ci_low"] = low * 100
+    df["no_ci_high"] = high * 100
+    return df
+
 
 def aggregate_by_lesson(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Aggregate feedback by course, chapter_num, section_num, item_num, and lesson_title.
-    This computes yes/no counts based on the percentages.
+    Aggregate feedback by course_id, lesson_id, chapter_num, section_num, and item_num, with the course name
+    and lesson_title carried along as labels. Parsed data from before lesson ids existed gets them derived.
+    This computes yes/no counts based on the percentages, plus the "no" rate and its confidence interval.
     """
     df = df.copy()
+    if "lesson_id" not in df.columns:
+        add_id_columns(df)
 
     # Convert string columns to numeric
     df["chapter_num"] = df["chapter"].astype(int)
@@ -21,21 +101,205 @@ def aggregate_by_lesson(df: pd.DataFrame) -> pd.DataFrame:
     df["yes_count"] = (df["num_responses"] * df["yes_percentage"] / 100).round().astype(int)
     df["no_count"] = (df["num_responses"] * df["no_percentage"] / 100).round().astype(int)
 
+    # Group on integer keys only; the labels are taken from the first card of each group.
     agg_df = (
-        df.groupby(["course", "chapter_num", "section_num", "item_num", "lesson_title"])
-        .agg(total_responses=("num_responses", "sum"), yes_count=("yes_count", "sum"), no_count=("no_count", "sum"))
+        df.groupby(["course_id", "lesson_id", "chapter_num", "section_num", "item_num"], sort=False)
+        .agg(
+            course=("course", "first"),
+            lesson_title=("lesson_title", "first"),
+            total_responses=("num_responses", "sum"),
+            yes_count=("yes_count", "sum"),
+            no_count=("no_count", "sum"),
+        )
+        .reset_index()
+    )
+    agg_df = agg_df.sort_values(["course", "chapter_num", "section_num", "item_num"], kind="stable")
+    return add_no_rate_columns(agg_df.reset_index(drop=True))
+
+
+def course_family(course: str) -> str:
+    """
+    Groups related courses: "Prealgebra 1 Self-Paced" and "Prealgebra 2 Self-Paced" are both "Prealgebra",
+    "Introduction to Algebra A/B Self-Paced" are both "Introduction to Algebra".
+    """
+    name = course.replace("Self-Paced", "").strip()
+    return COURSE_LEVEL_REGEX.sub("", name)
+
+
+def build_lesson_ranking(agg_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the cross-course lesson ranking index: one row per lesson of every course (excluding "Feedback"
+    lessons, as in the charts) with its course family and "no" rate interval, presorted from worst to best
+    by RANKING_KEY so that top-k queries only need to filter and take the head.
+
+    Aggregated rows of one lesson that differ only in item_num are merged first, as in the charts, so each
+    lesson is ranked once on all of its responses.
+    """
+    ranking = agg_df[~agg_df["lesson_title"].str.contains("feedback", case=False, na=False)]
+    ranking = (
+        ranking.groupby(["course_id", "lesson_id"], sort=False)
+        .agg(
+            course=("course", "first"),
+            chapter_num=("chapter_num", "min"),
+            section_num=("section_num", "min"),
+            item_num=("item_num", "min"),
+            lesson_title=("lesson_title", "first"),
+            yes_count=("yes_count", "sum"),
+            no_count=("no_count", "sum"),
+        )
         .reset_index()
     )
+    ranking = add_no_rate_columns(ranking)
+    ranking.insert(3, "course_family", ranking["course"].map(course_family))
+    ranking["responses"] = ranking["yes_count"] + ranking["no_count"]
+    ranking = ranking.sort_values([RANKING_KEY, "no_pct", "responses"], ascending=False, kind="stable")
+    ranking["rank"] = range(1, len(ranking) + 1)
+    return ranking.reset_index(drop=True)
 
+
+def top_worst_lessons(
+    ranking: pd.DataFrame,
+    n: int = 10,
+    families: Optional[list] = None,
+    min_responses: int = 0,
+    by: str = RANKING_KEY,
+) -> pd.DataFrame:
+    """
+    Returns the n worst lessons of a ranking built by build_lesson_ranking, optionally restricted to some course
+    families and to lessons with at least min_responses responses.
+
+    Ranking by RANKING_KEY uses the index's presorted order; any other column uses a partial (argpartition)
+    top-k selection, so the whole index is never re-sorted.
+    """
+    mask = ranking["responses"].to_numpy() >= min_responses
+    if families:
+        mask &= ranking["course_family"].isin(families).to_numpy()
+    candidates = ranking[mask]
+    if by == RANKING_KEY:
+        return candidates.head(n)
+    if len(candidates) <= n:
+        return candidates.sort_values(by, ascending=False, kind="stable")
+
+    values = candidates[by].to_numpy(dtype=float)
+    # NaN (lessons with no yes/no responses) should never make the top.
+    values = np.where(np.isnan(values), -np.inf, values)
+    top = np.argpartition(-values, n - 1)[:n]
+    top = top[np.argsort(-values[top], kind="stable")]
+    return candidates.iloc[top]
+
+
+def build_rollup_cube(agg_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Materializes yes/no totals at every level of the course → chapter → section → lesson hierarchy
+    (excluding "Feedback" lessons, as in the charts). The lesson level is grouped from agg_df and each level
+    above it from the level below, so the aggregated rows are only read once.
+
+    Returns one row per node with its level, the ROLLUP_KEYS down to that level (ROLLUP_ALL below it),
+    a display label, the number of lessons under it, the counts, and the "no" rate with its interval.
+    Rows are in chronological order within each level, and levels go from the top down.
+    """
+    lessons = agg_df[~agg_df["lesson_title"].str.contains("feedback", case=False, na=False)]
+    counts = {"total_responses": "sum", "yes_count": "sum", "no_count": "sum"}
+    current = (
+        lessons.groupby(ROLLUP_KEYS, sort=False)
+        .agg({"course": "first", "lesson_title": "first", **counts})
+        .reset_index()
+        .assign(lessons=1)
+    )
+    counts["lessons"] = "sum"
+    levels = {"lesson": current}
+    for depth in range(len(ROLLUP_KEYS) - 1, 0, -1):
+        current = current.groupby(ROLLUP_KEYS[:depth], sort=False).agg({"course": "first", **counts}).reset_index()
+        levels[ROLLUP_LEVELS[depth - 1]] = current
+
+    cube = pd.concat([levels[level].assign(level=level) for level in ROLLUP_LEVELS], ignore_index=True)
+    cube[ROLLUP_KEYS] = cube[ROLLUP_KEYS].fillna(ROLLUP_ALL).astype("int64")
+    chapter, section = cube["chapter_num"].astype(str), cube["section_num"].astype(str)
+    cube["label"] = cube["course"].where(cube["level"] == "course", "Chapter " + chapter)
+    cube["label"] = cube["label"].where(~cube["level"].isin(["section", "lesson"]), chapter + "." + section)
+    cube["label"] = cube["label"].where(cube["level"] != "lesson", cube["label"] + " " + cube["lesson_title"])
+    cube = cube[["level"] + ROLLUP_KEYS + ["course", "label", "lessons", "total_responses", "yes_count", "no_count"]]
+    return add_no_rate_columns(cube)
+
+
+def rollup_lookup(cube: pd.DataFrame) -> Dict[tuple, pd.DataFrame]:
+    """
+    Indexes a rollup cube by parent for drill-down: () → every course, (course_id,) → its chapters,
+    (course_id, chapter_num) → that chapter's sections, (course_id, chapter_num, section_num) → its lessons.
+    """
+    lookup = {(): cube[cube["level"] == ROLLUP_LEVELS[0]]}
+    for depth, level in enumerate(ROLLUP_LEVELS[1:], start=1):
+        for key, children in cube[cube["level"] == level].groupby(ROLLUP_KEYS[:depth], sort=False):
+            lookup[tuple(int(k) for k in np.atleast_1d(key))] = children
+    return lookup
+
+
+def aggregate_file(
+    input_csv: str,
+    output_csv: str,
+    profile: Optional[bool] = None,
+    ranking_csv: Optional[str] = None,
+    rollup_csv: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Aggregate a parsed feedback CSV into output_csv, recording "aggregate" stage metrics.
+    If ranking_csv is given, the cross-course lesson ranking index is written there too, and likewise
+    the rollup cube to rollup_csv.
+    Pass profile=True to capture a profile (None defers to the SP_FEEDBACK_PROFILE environment variable).
+    """
+    with track_stage("aggregate") as metrics, profile_stage("aggregate", enabled=profile):
+        df = pd.read_csv(input_csv)
+        metrics.bytes_read = file_size(input_csv)
+
+        agg_df = aggregate_by_lesson(df)
+        metrics.rows = len(df)
+
+        agg_df.to_csv(output_csv, index=False)
+        metrics.bytes_written = file_size(output_csv)
+        if ranking_csv:
+            build_lesson_ranking(agg_df).to_csv(ranking_csv, index=False)
+            metrics.bytes_written += file_size(ranking_csv)
+        if rollup_csv:
+            build_rollup_cube(agg_df).to_csv(rollup_csv, index=False)
+            metrics.bytes_written += file_size(rollup_csv)
     return agg_df
 
 
+def main():
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    parser = argparse.ArgumentParser(description="Aggregate parsed feedback by lesson.")
+    parser.add_argument(
+        "--input",
+        type=str,
+        default=os.path.join(data_dir, "parsed_feedback.csv"),
+        help="Parsed feedback CSV (default: data/parsed_feedback.csv)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join(data_dir, "aggregated_feedback.csv"),
+        help="Output CSV (default: data/aggregated_feedback.csv)",
+    )
+    parser.add_argument(
+        "--ranking",
+        type=str,
+        default=os.path.join(data_dir, "lesson_ranking.csv"),
+        help="Output CSV for the cross-course lesson ranking (default: data/lesson_ranking.csv)",
+    )
+    parser.add_argument(
+        "--rollup",
+        type=str,
+        default=os.path.join(data_dir, "rollup_cube.csv"),
+        help="Output CSV for the course/chapter/section/lesson rollup cube (default: data/rollup_cube.csv)",
+    )
+    parser.add_argument("--profile", action="store_true", help="Capture a cProfile/tracemalloc profile of aggregation")
+    args = parser.parse_args()
+
+    aggregate_file(
+        args.input, args.output, profile=args.profile or None, ranking_csv=args.ranking, rollup_csv=args.rollup
+    )
+    print(f"Aggregated data written to {args.output}, {args.ranking}, and {args.rollup}")
+
+
 if __name__ == "__main__":
-    # Example usage
-    input_csv = os.path.join(os.path.dirname(__file__), "..", "data", "parsed_feedback.csv")
-    output_csv = os.path.join(os.path.dirname(__file__), "..", "data", "aggregated_feedback.csv")
-
-    df = pd.read_csv(input_csv)
-    agg_df = aggregate_by_lesson(df)
-    agg_df.to_csv(output_csv, index=False)
-    print(f"Aggregated data written to {output_csv}")
+    main()
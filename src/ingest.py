@@ -0,0 +1,139 @@
+# src/ingest.py
+
+import argparse
+import bz2
+import glob
+import gzip
+import lzma
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+from src.comments import CommentStore, store_path
+from src.metrics import file_size, track_stage
+from src.parser import parse_feedback
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Identify a card that has no self-paced id.
+LESSON_FIELDS = ["course_id", "lesson_id", "chapter", "section", "item"]
+
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+# The report embeds the time it was generated, e.g. "serverTime":"2025-02-17T13:21:56-05:00".
+SERVER_TIME_REGEX = re.compile(r'"serverTime"\s*:\s*"(\d{4}-\d{2}-\d{2})')
+# Fallback: a date in the file name, e.g. feedback_2024-06-01.html or feedback-20240601.html.gz.
+FILENAME_DATE_REGEX = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})")
+
+
+def read_export(path: str) -> str:
+    """Read a saved feedback page, decompressing .gz, .bz2, and .xz files."""
+    opener = OPENERS.get(os.path.splitext(path)[1].lower(), open)
+    with opener(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def export_date(path: str, html: str) -> str:
+    """
+    Date (YYYY-MM-DD) an export was taken: the report's own server time if present,
+    else a date in the file name, else the file's modification time.
+    """
+    match = SERVER_TIME_REGEX.search(html)
+    if match:
+        return match.group(1)
+    match = FILENAME_DATE_REGEX.search(os.path.basename(path))
+    if match:
+        return "-".join(match.groups())
+    return datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def parse_export(path: str) -> pd.DataFrame:
+    """Parse one saved export and tag each card with its source file and export date."""
+    html = read_export(path)
+    df = parse_feedback(html)
+    df["source_file"] = os.path.basename(path)
+    df["export_date"] = export_date(path, html)
+    return df
+
+
+def expand_patterns(patterns: Sequence[str]) -> List[str]:
+    """Expand glob patterns into a sorted, duplicate-free list of files."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def merge_exports(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combine parsed exports, keeping one row per card: the one from the latest export.
+    Cards are identified by self_paced_id; cards without one fall back to their course and lesson fields.
+    """
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.sort_values(["export_date", "source_file"], kind="stable")
+    has_id = merged["self_paced_id"].notna()
+    with_id = merged[has_id].drop_duplicates("self_paced_id", keep="last")
+    without_id = merged[~has_id].drop_duplicates(LESSON_FIELDS, keep="last")
+    merged = pd.concat([with_id, without_id]).sort_index()
+    return merged.reset_index(drop=True)
+
+
+def ingest_exports(patterns: Sequence[str], output_csv: str, jobs: Optional[int] = None) -> pd.DataFrame:
+    """
+    Parse every export matching the glob patterns in a pool of `jobs` processes (None uses every core),
+    deduplicate cards, and write the merged dataset to output_csv with its comment store next to it,
+    recording "ingest" stage metrics.
+    """
+    paths = expand_patterns(patterns)
+    if not paths:
+        raise FileNotFoundError(f"No exports match {', '.join(patterns)}")
+
+    with track_stage("ingest") as metrics:
+        metrics.bytes_read = sum(file_size(path) for path in paths)
+        if jobs == 1 or len(paths) == 1:
+            frames = [parse_export(path) for path in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                frames = list(executor.map(parse_export, paths))
+        metrics.rows = sum(len(df) for df in frames)
+
+        merged = merge_exports(frames)
+        output_dir = os.path.dirname(output_csv)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        store = CommentStore()
+        if not merged.empty:
+            merged = store.intern(merged)
+        merged.to_csv(output_csv, index=False)
+        store.save(store_path(output_csv))
+        metrics.bytes_written = file_size(output_csv) + file_size(store_path(output_csv))
+    print(f"Ingested {len(paths)} export(s): {metrics.rows} cards, {len(merged)} after deduplication")
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse a directory of saved feedback exports into one dataset.")
+    parser.add_argument("patterns", nargs="+", help='Glob(s) of saved pages, e.g. "exports/*.html*" (quote them)')
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join(DATA_DIR, "parsed_feedback_history.csv"),
+        help="Merged output CSV (default: data/parsed_feedback_history.csv)",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=0, help="Worker processes (default: 0, which uses every core)"
+    )
+    args = parser.parse_args()
+
+    ingest_exports(args.patterns, args.output, jobs=args.jobs or None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# src/metrics.py
+
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; memory is then reported as 0.
+    resource = None
+
+# Where metrics are appended. Setting the variable to an empty string disables writing.
+METRICS_PATH_ENV_VAR = "SP_FEEDBACK_METRICS"
+# Lets the stages of one pipeline run (possibly in separate processes) share a run id.
+RUN_ID_ENV_VAR = "SP_FEEDBACK_RUN_ID"
+DEFAULT_METRICS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "metrics.jsonl")
+
+# Linux reports resident memory (VmRSS) and its high-water mark (VmHWM) in /proc/self/status, and resets the
+# high-water mark to the current RSS when "5" is written to /proc/self/clear_refs.
+PROC_STATUS_PATH = "/proc/self/status"
+PROC_CLEAR_REFS_PATH = "/proc/self/clear_refs"
+
+# Peaks already reached by the stages open in this process (innermost last). A nested stage resets the
+# high-water mark when it starts, so it folds the mark into these first.
+_open_stage_peaks: List[int] = []
+# Highest high-water mark seen before any reset; resetting also lowers ru_maxrss on Linux.
+_process_peak_kb = 0
+
+
+@dataclass
+class StageMetrics:
+    """Measurements for one execution of a pipeline stage or app rerun."""
+
+    stage: str
+    run_id: str
+    started_at: str
+    status: str = "ok"
+    wall_seconds: float = 0.0
+    rows: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    # Peak resident memory while the stage ran, and how far that is above the resident memory it started with.
+    # Where the high-water mark can't be reset (anything but Linux), the stage peak is the process peak so far.
+    stage_peak_rss_kb: int = 0
+    rss_growth_kb: int = 0
+    # Peak resident memory of the whole process so far.
+    process_peak_rss_kb: int = 0
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def current_run_id() -> str:
+    """Return the run id shared through the environment, creating one for this process if needed."""
+    if not os.environ.get(RUN_ID_ENV_VAR):
+        os.environ[RUN_ID_ENV_VAR] = new_run_id()
+    return os.environ[RUN_ID_ENV_VAR]
+
+
+def metrics_path() -> Optional[str]:
+    """Return the metrics file path, or None if metrics writing is disabled."""
+    path = os.environ.get(METRICS_PATH_ENV_VAR, DEFAULT_METRICS_PATH)
+    return path or None
+
+
+def max_rss_kb() -> int:
+    """High-water mark of this process's resident memory so far in KiB (0 where unavailable)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def proc_status_kb(field: str) -> Optional[int]:
+    """A memory field of /proc/self/status (e.g. "VmRSS", "VmHWM") in KiB, or None where unavailable."""
+    try:
+        with open(PROC_STATUS_PATH, "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """Reset this process's resident memory high-water mark to its current RSS. Returns whether it worked."""
+    try:
+        with open(PROC_CLEAR_REFS_PATH, "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def file_size(path: str) -> int:
+    """Size of path in bytes, or 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def write_metrics(record: StageMetrics, path: Optional[str] = None):
+    """Append one record to the JSON-lines metrics file."""
+    path = path or metrics_path()
+    if not path:
+        return
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(asdict(record)) + "\n")
+
+
+@contextmanager
+def track_stage(stage: str, run_id: Optional[str] = None, path: Optional[str] = None):
+    """
+    Time a block of work and append its metrics when the block exits.
+
+    The yielded StageMetrics can be filled in with rows, bytes_read, and bytes_written by the caller;
+    wall time, memory (the stage's own peak where the platform allows resetting the high-water mark), and
+    status (ok/error) are recorded automatically.
+    """
+    record = StageMetrics(
+        stage=stage, run_id=run_id or current_run_id(), started_at=datetime.now(timezone.utc).isoformat()
+    )
+    global _process_peak_kb
+    high_water_kb = proc_status_kb("VmHWM")
+    if high_water_kb is not None:
+        _process_peak_kb = max(_process_peak_kb, high_water_kb)
+        _open_stage_peaks[:] = [max(peak, high_water_kb) for peak in _open_stage_peaks]
+    per_stage = high_water_kb is not None and reset_peak_rss()
+    start_rss_kb = (proc_status_kb("VmRSS") or 0) if per_stage else max_rss_kb()
+    _open_stage_peaks.append(0)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record.status = "error"
+        raise
+    finally:
+        record.wall_seconds = round(time.perf_counter() - start, 6)
+        nested_peak_kb = _open_stage_peaks.pop()
+        if per_stage:
+            record.stage_peak_rss_kb = max(proc_status_kb("VmHWM") or 0, nested_peak_kb)
+        else:
+            record.stage_peak_rss_kb = max_rss_kb()
+        record.rss_growth_kb = max(record.stage_peak_rss_kb - start_rss_kb, 0)
+        _process_peak_kb = max(_process_peak_kb, record.stage_peak_rss_kb)
+        record.process_peak_rss_kb = max(_process_peak_kb, max_rss_kb())
+        write_metrics(record, path)
+
+
+def read_metrics(path: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+    """Read metrics records (the most recent `limit` if given), skipping malformed lines."""
+    path = path or metrics_path()
+    if not path or not os.path.exists(path):
+        return []
+    records = deque(maxlen=limit)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return list(records)
@@ -1,18 +1,39 @@
 # src/parser.py
 
+import argparse
 import os
 import re
+import zlib
 from typing import Dict, Optional
 
 import pandas as pd
 from bs4 import BeautifulSoup
 
+from src.comments import CommentStore, store_path
+from src.metrics import file_size, track_stage
+from src.profiling import profile_stage
+
 # Regex to extract lesson information from the header
 LESSON_REGEX = re.compile(r"Lesson\s+(\d+)\.(\d+)\.(\d+)\s+(.*)")
 
+# Matches bare <br> tags, which are rewritten as <br/> before parsing (see parse_feedback).
+BR_TAG_REGEX = re.compile(r"<br\s*>", re.IGNORECASE)
+
 # Regex to extract footer details: collection, document id, and self-paced id.
 FOOTER_REGEX = re.compile(r"Collection:\s*(\d+).*Document ID:\s*(\d+).*Self-paced ID:\s*(\d+)", re.DOTALL)
 
+# Class attribute (as BeautifulSoup joins it) of each tag parse_feedback reads: course headers and feedback cards.
+PARSED_TAG_CLASSES = {"h3": "p-0 m-0", "div": "card mb-4"}
+# Opening h3/div tags and their class attribute, for finding those tags without building a soup (parsed_markup).
+OPEN_TAG_REGEX = re.compile(r"<(h3|div)\b([^>]*)>", re.IGNORECASE)
+CLASS_ATTR_REGEX = re.compile(r"""(?:^|\s)class\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+# Div tags (opening or closing) and the end of a header, for finding where a matched tag ends.
+DIV_TAG_REGEX = re.compile(r"<(/?)div\b", re.IGNORECASE)
+H3_END_REGEX = re.compile(r"</h3\s*>", re.IGNORECASE)
+
+# Fallback lesson ids (for cards without a document id) start here, past any id the page can show.
+FALLBACK_ID_OFFSET = 2**32
+
 
 def clean_text(text: str) -> str:
     """Collapse whitespace and trim."""
@@ -73,38 +94,148 @@ def parse_card(card) -> Optional[Dict]:
     }
 
 
+def text_id(text: str) -> int:
+    """Stable integer id of a string (its CRC-32), the same in every process and run."""
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def add_id_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the integer keys every later groupby and merge uses, so titles are only ever labels:
+    course_id (the page has no course id, so it is derived from the course name) and lesson_id
+    (the card's document id, shared by every card of the same lesson; cards without one, or data without
+    a document_id column, fall back to an id derived from their section and title, e.g. "3.2 Review", so
+    same-titled lessons in different chapters or sections stay apart). The item is left out, as one lesson's
+    cards can be listed under several items. Works on parsed cards (chapter, section) and on aggregates
+    (chapter_num, section_num). Modifies and returns df.
+    """
+    df["course_id"] = df["course"].map(text_id).astype("int64")
+    document_ids = pd.to_numeric(df.get("document_id", pd.Series(None, index=df.index)), errors="coerce")
+    chapter, section = (
+        df[name if name in df.columns else f"{name}_num"].astype(int).astype(str) for name in ("chapter", "section")
+    )
+    fallback_keys = chapter + "." + section + " " + df["lesson_title"]
+    fallback_ids = fallback_keys.map(text_id) + FALLBACK_ID_OFFSET
+    df["lesson_id"] = document_ids.fillna(fallback_ids).astype("int64")
+    return df
+
+
+def is_parsed_tag(name: str, classes: str) -> bool:
+    """Whether a tag with this name and class attribute is a course header or feedback card."""
+    return PARSED_TAG_CLASSES.get(name.lower()) == " ".join(classes.split())
+
+
+def parsed_markup(html: str) -> str:
+    """
+    The course headers and feedback cards of a report page, in page order: the only markup parse_feedback
+    reads. Everything around them (scripts, tracking beacons, links with per-load query strings) is dropped,
+    so two loads of an unchanged report give the same result. A card ends at the </div> closing its own div.
+
+    Tags are matched with is_parsed_tag, like the parser does. If the cards found don't account for every
+    "card mb-4" in the page (markup the regexes can't read), the whole page is returned instead, so that a
+    card the parser sees is never left out.
+    """
+    parts, cards = [], 0
+    for match in OPEN_TAG_REGEX.finditer(html):
+        name = match.group(1).lower()
+        class_attr = CLASS_ATTR_REGEX.search(match.group(2))
+        if class_attr is None or not is_parsed_tag(name, next(g for g in class_attr.groups() if g is not None)):
+            continue
+        start = match.start()
+        if name == "h3":
+            end_tag = H3_END_REGEX.search(html, match.end())
+            if end_tag is not None:
+                end = end_tag.end()
+                parts.append(html[start:end])
+            continue
+        cards += 1
+        depth = 0
+        for tag in DIV_TAG_REGEX.finditer(html, start):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                end = tag.end()
+                parts.append(html[start:end])
+                break
+    if cards != html.count(PARSED_TAG_CLASSES["div"]):
+        return html
+    return "\n".join(parts)
+
+
+def is_course_header_or_card(tag) -> bool:
+    """Match course headers (h3 "p-0 m-0") and feedback cards (div "card mb-4")."""
+    return is_parsed_tag(tag.name, " ".join(tag.get("class") or []))
+
+
 def parse_feedback(html: str) -> pd.DataFrame:
+    # BeautifulSoup's html.parser builder keeps every bare <br> in a list that it scans on each end tag,
+    # which makes parsing quadratic in the number of cards; self-closed <br/> tags skip that list.
+    html = BR_TAG_REGEX.sub("<br/>", html)
     soup = BeautifulSoup(html, "html.parser")
     records = []
-    # Find all cards regardless of their container.
-    cards = soup.find_all("div", class_="card mb-4")
-    for card in cards:
-        record = parse_card(card)
+    # Walk course headers and cards (regardless of their container) in document order in a single pass,
+    # so each card belongs to the closest preceding h3 with class "p-0 m-0".
+    course = "Unknown Course"
+    for tag in soup.find_all(is_course_header_or_card):
+        if tag.name == "h3":
+            course = clean_text(tag.get_text())
+            continue
+        record = parse_card(tag)
         if record:
-            # Look for the closest preceding h3 with class "p-0 m-0"
-            course_header = card.find_previous("h3", class_="p-0 m-0")
-            if course_header:
-                course = clean_text(course_header.get_text())
-            else:
-                course = "Unknown Course"
             record["course"] = course
             records.append(record)
-    return pd.DataFrame(records)
+    df = pd.DataFrame(records)
+    return add_id_columns(df) if records else df
+
+
+def parse_file(html_filepath: str, output_csv: str, profile: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Parse a saved feedback page and write the cards to output_csv, recording "parse" stage metrics.
+    Comment texts are stored once each in the comment store next to it (see store_path); the cards
+    reference them by id. Returns the cards as written.
+    Pass profile=True to capture a profile (None defers to the SP_FEEDBACK_PROFILE environment variable).
+    """
+    with track_stage("parse") as metrics, profile_stage("parse", enabled=profile):
+        with open(html_filepath, "r", encoding="utf-8") as f:
+            html_content = f.read()
+        metrics.bytes_read = file_size(html_filepath)
+
+        df = parse_feedback(html_content)
+        metrics.rows = len(df)
+
+        # Ensure the output directory exists.
+        output_dir = os.path.dirname(output_csv)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        store = CommentStore()
+        if not df.empty:
+            df = store.intern(df)
+        df.to_csv(output_csv, index=False)
+        store.save(store_path(output_csv))
+        metrics.bytes_written = file_size(output_csv) + file_size(store_path(output_csv))
+    return df
+
+
+def main():
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    parser = argparse.ArgumentParser(description="Parse the saved feedback page into a CSV.")
+    parser.add_argument(
+        "--input",
+        type=str,
+        default=os.path.join(data_dir, "feedback_page.html"),
+        help="Saved feedback page (default: data/feedback_page.html)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join(data_dir, "parsed_feedback.csv"),
+        help="Output CSV (default: data/parsed_feedback.csv)",
+    )
+    parser.add_argument("--profile", action="store_true", help="Capture a cProfile/tracemalloc profile of parsing")
+    args = parser.parse_args()
+
+    parse_file(args.input, args.output, profile=args.profile or None)
+    print(f"Parsed DataFrame written to {args.output}, comments to {store_path(args.output)}")
 
 
 if __name__ == "__main__":
-    # Read the HTML from your saved file.
-    html_filepath = os.path.join(os.path.dirname(__file__), "..", "data", "feedback_page.html")
-    with open(html_filepath, "r", encoding="utf-8") as f:
-        html_content = f.read()
-
-    df = parse_feedback(html_content)
-
-    # Ensure the output directory exists.
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Write the DataFrame to CSV.
-    output_csv = os.path.join(output_dir, "parsed_feedback.csv")
-    df.to_csv(output_csv, index=False)
-    print(f"Parsed DataFrame written to {output_csv}")
+    main()
@@ -0,0 +1,239 @@
+# src/pipeline.py
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from src.alerts import alerts_file
+from src.comments import store_path
+from src.data_processor import aggregate_file
+from src.parser import parse_file, parsed_markup
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+MANIFEST_FILENAME = "pipeline_manifest.json"
+FEEDBACK_URL = "https://artofproblemsolving.com/reports/self-paced-feedback"
+
+
+@dataclass
+class Stage:
+    """
+    One step of the pipeline. A stage re-runs only when the content of its inputs or its code has changed
+    since its last successful run, or when one of its outputs is missing or was modified.
+    Stages marked always_run (the fetch) run every time; their outputs still gate downstream stages.
+    """
+
+    name: str
+    run: Callable[[], None]
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    code: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    always_run: bool = False
+
+
+def file_hash(path: str) -> Optional[str]:
+    """
+    SHA-256 of a file's content, or None if it does not exist. For HTML only the markup the parser reads
+    counts, as the rest of the report page (server time, beacons, tracking query strings) changes on every load.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        content = f.read()
+    if path.endswith((".html", ".htm")):
+        content = parsed_markup(content.decode("utf-8", errors="replace")).encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def module_path(module_name: str) -> str:
+    return os.path.join(os.path.dirname(__file__), f"{module_name}.py")
+
+
+def default_stages(data_dir: str = DATA_DIR) -> Dict[str, Stage]:
+    """The scrape → parse → aggregate → alerts chain over the files in data_dir."""
+    html_path = os.path.join(data_dir, "feedback_page.html")
+    parsed_csv = os.path.join(data_dir, "parsed_feedback.csv")
+    aggregated_csv = os.path.join(data_dir, "aggregated_feedback.csv")
+    previous_csv = os.path.join(data_dir, "aggregated_feedback_previous.csv")
+    # Hash of the parsed data the current aggregate was built from.
+    source_path = os.path.join(data_dir, "aggregated_feedback_source.json")
+    ranking_csv = os.path.join(data_dir, "lesson_ranking.csv")
+    rollup_csv = os.path.join(data_dir, "rollup_cube.csv")
+    alerts_csv = os.path.join(data_dir, "alerts.csv")
+
+    def scrape():
+        # Imported lazily so the other stages can run without selenium installed.
+        from src.scraper import scrape_to_file
+
+        if not scrape_to_file(FEEDBACK_URL, html_path):
+            raise RuntimeError("Failed to retrieve the feedback page.")
+
+    def aggregate():
+        # Keep the last aggregate built from other parsed data, for the alerts stage to compare against. Re-runs
+        # on the same data (a code change, --force) must not replace that baseline with a copy of itself.
+        input_hash = file_hash(parsed_csv)
+        built_from = load_manifest(source_path).get(os.path.basename(parsed_csv))
+        if os.path.exists(aggregated_csv) and built_from not in (None, input_hash):
+            shutil.copyfile(aggregated_csv, previous_csv)
+        aggregate_file(parsed_csv, aggregated_csv, ranking_csv=ranking_csv, rollup_csv=rollup_csv)
+        save_manifest({os.path.basename(parsed_csv): input_hash}, source_path)
+
+    stages = [
+        Stage("scrape", scrape, outputs=[html_path], code=[module_path("scraper")], always_run=True),
+        Stage(
+            "parse",
+            lambda: parse_file(html_path, parsed_csv),
+            inputs=[html_path],
+            outputs=[parsed_csv, store_path(parsed_csv)],
+            code=[module_path("parser"), module_path("comments")],
+            deps=["scrape"],
+        ),
+        Stage(
+            "aggregate",
+            aggregate,
+            inputs=[parsed_csv],
+            outputs=[aggregated_csv, ranking_csv, rollup_csv, source_path],
+            code=[module_path("data_processor")],
+            deps=["parse"],
+        ),
+        Stage(
+            "alerts",
+            lambda: alerts_file(previous_csv, aggregated_csv, alerts_csv),
+            inputs=[previous_csv, aggregated_csv],
+            outputs=[alerts_csv],
+            code=[module_path("alerts")],
+            deps=["aggregate"],
+        ),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+def topological_order(stages: Dict[str, Stage]) -> List[str]:
+    """Order stage names so every stage comes after its dependencies."""
+    ordered, visiting = [], set()
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+        visiting.add(name)
+        for dep in stages[name].deps:
+            if dep in stages:
+                visit(dep)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in stages:
+        visit(name)
+    return ordered
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+
+def save_manifest(manifest: dict, path: str):
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def stage_fingerprint(stage: Stage) -> dict:
+    """Current content hashes of a stage's inputs and code."""
+    return {
+        "inputs": {os.path.basename(p): file_hash(p) for p in stage.inputs},
+        "code": {os.path.basename(p): file_hash(p) for p in stage.code},
+    }
+
+
+def is_up_to_date(stage: Stage, entry: Optional[dict]) -> bool:
+    """Whether the manifest entry shows the stage already ran on these inputs and its outputs are intact."""
+    if entry is None or stage.always_run:
+        return False
+    current = stage_fingerprint(stage)
+    if entry.get("inputs") != current["inputs"] or entry.get("code") != current["code"]:
+        return False
+    recorded_outputs = entry.get("outputs", {})
+    for path in stage.outputs:
+        current_hash = file_hash(path)
+        if current_hash is None or recorded_outputs.get(os.path.basename(path)) != current_hash:
+            return False
+    return True
+
+
+def run_pipeline(
+    stages: Optional[Dict[str, Stage]] = None,
+    selected: Optional[List[str]] = None,
+    force: bool = False,
+    manifest_path: Optional[str] = None,
+    log: Callable[[str], None] = print,
+) -> Dict[str, str]:
+    """
+    Run the selected stages (default: all) in dependency order, skipping those that are up to date.
+
+    Returns a mapping of stage name to "ran" or "skipped". A failing stage raises and leaves the
+    manifest entries of the stages before it in place.
+    """
+    stages = stages if stages is not None else default_stages()
+    manifest_path = manifest_path or os.path.join(DATA_DIR, MANIFEST_FILENAME)
+    unknown = set(selected or []) - set(stages)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s): {', '.join(sorted(unknown))}")
+
+    manifest = load_manifest(manifest_path)
+    statuses = {}
+    for name in topological_order(stages):
+        if selected and name not in selected:
+            continue
+        stage = stages[name]
+        if not force and is_up_to_date(stage, manifest.get(name)):
+            statuses[name] = "skipped"
+            log(f"{name}: skipped (inputs and code unchanged)")
+            continue
+
+        start = time.perf_counter()
+        stage.run()
+        manifest[name] = {
+            **stage_fingerprint(stage),
+            "outputs": {os.path.basename(p): file_hash(p) for p in stage.outputs},
+        }
+        save_manifest(manifest, manifest_path)
+        statuses[name] = "ran"
+        log(f"{name}: ran in {time.perf_counter() - start:.2f}s")
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the feedback pipeline, skipping stages whose inputs and code are unchanged."
+    )
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=list(default_stages()),
+        help="Run only this stage (repeatable). Default: every stage.",
+    )
+    parser.add_argument("--force", action="store_true", help="Re-run the selected stages even if nothing changed")
+    args = parser.parse_args()
+
+    run_pipeline(selected=args.stage, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# src/profiling.py
+
+import cProfile
+import os
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+# Comma-separated stage names to profile (e.g. "parse,aggregate"), or "all".
+PROFILE_ENV_VAR = "SP_FEEDBACK_PROFILE"
+PROFILE_DIR_ENV_VAR = "SP_FEEDBACK_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "profiles")
+# Number of allocation sites written to the memory report.
+TOP_ALLOCATIONS = 25
+
+# Peak traced memory already reached by each profiled block open in this process, outermost first. Only the
+# outermost block runs cProfile: a second profiler would replace it (or, on Python 3.12+, fail to start).
+# Nested blocks reset the tracemalloc peak, so they fold it into these first.
+_open_peaks: List[int] = []
+
+
+@dataclass
+class ProfileCapture:
+    """Paths of the files written by one profiled stage, filled in when the stage finishes."""
+
+    stage: str
+    prof_path: Optional[str] = None
+    alloc_path: Optional[str] = None
+
+
+def profiling_enabled(stage: str) -> bool:
+    """Whether the SP_FEEDBACK_PROFILE environment variable selects this stage."""
+    selected = {name.strip() for name in os.environ.get(PROFILE_ENV_VAR, "").split(",") if name.strip()}
+    return "all" in selected or stage in selected
+
+
+def write_allocation_report(snapshot: tracemalloc.Snapshot, peak_bytes: int, path: str):
+    """
+    Write the peak traced memory and the top allocation sites (by size) of a tracemalloc snapshot.
+    The snapshot is taken when the stage ends, so the sites are what the stage retained, not what it held
+    at its peak; temporaries freed before the end only show up in the peak figure.
+    """
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+    stats = snapshot.statistics("lineno")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Peak traced memory: {peak_bytes / 1024:.1f} KiB\n")
+        f.write(f"Top {TOP_ALLOCATIONS} allocation sites retained at the end of the stage (not at the peak):\n\n")
+        for stat in stats[:TOP_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            f.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}\n")
+
+
+@contextmanager
+def profile_stage(stage: str, enabled: Optional[bool] = None, output_dir: Optional[str] = None):
+    """
+    Run a block under cProfile and tracemalloc and save the results as <stage>-<timestamp>.prof
+    (loadable with pstats or snakeviz) and <stage>-<timestamp>.alloc.txt.
+
+    If enabled is None the SP_FEEDBACK_PROFILE environment variable decides. When profiling is off
+    the block runs untouched and None is yielded. A block nested in another profiled block only gets the
+    allocation report (prof_path stays None); its calls are recorded by the enclosing block's profiler.
+    """
+    if enabled is None:
+        enabled = profiling_enabled(stage)
+    if not enabled:
+        yield None
+        return
+
+    output_dir = output_dir or os.environ.get(PROFILE_DIR_ENV_VAR) or DEFAULT_PROFILE_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{stage}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}")
+    capture = ProfileCapture(stage=stage)
+
+    # Leave tracemalloc running if an outer profiled block started it.
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    _, outer_peak = tracemalloc.get_traced_memory()
+    _open_peaks[:] = [max(peak, outer_peak) for peak in _open_peaks]
+    tracemalloc.reset_peak()
+    profiler = None if _open_peaks else cProfile.Profile()
+    _open_peaks.append(0)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield capture
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, _open_peaks.pop())
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+        capture.alloc_path = base + ".alloc.txt"
+        write_allocation_report(snapshot, peak, capture.alloc_path)
+        if profiler is not None:
+            capture.prof_path = base + ".prof"
+            profiler.dump_stats(capture.prof_path)
+            print(f"Profile for '{stage}' saved to {capture.prof_path} and {capture.alloc_path}")
+        else:
+            print(f"Allocations for '{stage}' saved to {capture.alloc_path} (its calls are in the enclosing profile)")
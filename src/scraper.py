@@ -9,6 +9,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from src.metrics import file_size, track_stage
+from src.profiling import profile_stage
+
 
 def authenticate_and_get_page(url: str, timeout: int = 300):
     """
@@ -63,16 +66,37 @@ def authenticate_and_get_page(url: str, timeout: int = 300):
     return driver, page_source
 
 
-if __name__ == "__main__":
-    FEEDBACK_URL = "https://artofproblemsolving.com/reports/self-paced-feedback"
-    driver, page_html = authenticate_and_get_page(FEEDBACK_URL)
-    if page_html:
-        # Determine output directory relative to this file.
-        output_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, "feedback_page.html")
+def scrape_to_file(url: str, filepath: str) -> bool:
+    """
+    Scrape the feedback page at url and save its HTML to filepath, recording "scrape" stage metrics
+    (and a profile when SP_FEEDBACK_PROFILE selects "scrape").
+
+    Returns True if the page was retrieved and saved.
+    """
+    with track_stage("scrape") as metrics, profile_stage("scrape"):
+        driver, page_html = authenticate_and_get_page(url)
+        if driver:
+            driver.quit()
+        if not page_html:
+            metrics.status = "failed"
+            return False
+
+        output_dir = os.path.dirname(filepath)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
         with open(filepath, "w", encoding="utf-8") as f:
             f.write(page_html)
+        metrics.rows = page_html.count('class="card mb-4"')
+        metrics.bytes_written = file_size(filepath)
+    return True
+
+
+if __name__ == "__main__":
+    FEEDBACK_URL = "https://artofproblemsolving.com/reports/self-paced-feedback"
+    # Determine output directory relative to this file.
+    output_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    filepath = os.path.join(output_dir, "feedback_page.html")
+    if scrape_to_file(FEEDBACK_URL, filepath):
         print(f"Page source saved to {filepath}")
     else:
         print("Failed to retrieve the page.")
@@ -0,0 +1,268 @@
+# src/static_site.py
+
+import argparse
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from src.comments import CommentStore, read_parsed_feedback, store_path
+from src.data_processor import read_lesson_csv
+from src.metrics import file_size, track_stage
+from src.pipeline import file_hash, load_manifest, module_path, save_manifest
+from src.views import (
+    build_course_display_map,
+    filter_courses,
+    prepare_comments_view,
+    sort_course_display_names,
+)
+from src.visualization import SORT_MODES, course_slug, render_course
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+SITE_MANIFEST_FILENAME = "site_manifest.json"
+CHARTS_DIRNAME = "charts"
+
+# Aggregated columns a course page depends on. The rates are derived from the counts, and hashing their
+# floats would flag pages as changed whenever a CSV round trip alters the last digit.
+FINGERPRINT_COLUMNS = ["lesson_id", "chapter_num", "section_num", "item_num", "lesson_title", "yes_count", "no_count"]
+
+# Modules whose code shapes the pages; changing any of them rebuilds every course.
+PAGE_CODE = [module_path("static_site"), module_path("visualization")]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>{style}</style>
+</head>
+<body>
+<p><a href="index.html">&larr; All courses</a></p>
+<h1>{title}</h1>
+{charts}
+<h2>Student Feedback Comments</h2>
+{comments}
+</body>
+</html>
+"""
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Self-Paced Feedback</title>
+<style>{style}</style>
+</head>
+<body>
+<h1>Self-Paced Feedback</h1>
+<table>
+<tr><th>Course</th><th>Lessons</th><th>Responses</th><th>No %</th></tr>
+{rows}
+</table>
+</body>
+</html>
+"""
+
+STYLE = (
+    "body{font-family:sans-serif;max-width:1200px;margin:2em auto;padding:0 1em}"
+    "img{max-width:100%}details{margin:.3em 0}summary{cursor:pointer}"
+    "table{border-collapse:collapse}td,th{padding:.3em .8em;border-bottom:1px solid #ddd;text-align:left}"
+)
+
+
+def mode_title(mode: str) -> str:
+    return mode.replace("-", " ").capitalize()
+
+
+def render_comments_html(comments_df: Optional[pd.DataFrame]) -> str:
+    """One collapsible block per lesson with comments; text written more than once is shown with "×N"."""
+    if comments_df is None:
+        return "<p>Parsed feedback data not found.</p>"
+    blocks = []
+    for _, row in comments_df.iterrows():
+        if not row["comments"]:
+            continue
+        label = html.escape(f"{row['chapter_num']}.{row['section_num']} {row['lesson_title']}")
+        items = "".join(
+            f"<li>{html.escape(text)}{f' ×{count}' if count > 1 else ''}</li>"
+            for text, count in zip(row["comments"], row["comment_counts"])
+        )
+        blocks.append(f"<details><summary>{label}</summary><ul>{items}</ul></details>")
+    return "\n".join(blocks) or "<p>No comments yet.</p>"
+
+
+def render_course_page(
+    course: str,
+    display_name: str,
+    course_df: pd.DataFrame,
+    comments_html: str,
+    output_dir: str,
+    modes: Sequence[str],
+) -> List[str]:
+    """Render a course's charts and write its page as <output_dir>/<course-slug>.html. Returns the files written."""
+    charts_dir = os.path.join(output_dir, CHARTS_DIRNAME)
+    chart_paths = render_course(course, course_df, charts_dir, modes)
+    charts = "\n".join(
+        f'<h2>{mode_title(mode)}</h2>\n<img src="{CHARTS_DIRNAME}/{os.path.basename(path)}" alt="{mode} chart">'
+        for mode in modes
+        for path in chart_paths
+        if path.endswith(f"-{mode}.png")
+    )
+    page_path = os.path.join(output_dir, f"{course_slug(course)}.html")
+    with open(page_path, "w", encoding="utf-8") as f:
+        f.write(
+            PAGE_TEMPLATE.format(
+                title=html.escape(f"Feedback for {display_name}"),
+                style=STYLE,
+                charts=charts or "<p>No lessons to plot.</p>",
+                comments=comments_html,
+            )
+        )
+    return chart_paths + [page_path]
+
+
+def render_index(agg_df: pd.DataFrame, course_display_map: Dict[str, str], path: str):
+    """Write the course index, in the app's preferred course order."""
+    summary = (
+        agg_df.groupby("course_id", sort=False)
+        .agg(
+            course=("course", "first"), lessons=("lesson_id", "size"), yes=("yes_count", "sum"), no=("no_count", "sum")
+        )
+        .set_index("course")
+    )
+    full_names = {display_name: course for course, display_name in course_display_map.items()}
+    rows = []
+    for display_name in sort_course_display_names(list(full_names)):
+        course = full_names[display_name]
+        lessons, yes, no = summary.loc[course, ["lessons", "yes", "no"]]
+        no_pct = f"{no / (yes + no) * 100:.1f}" if yes + no else "-"
+        rows.append(
+            f'<tr><td><a href="{course_slug(course)}.html">{html.escape(display_name)}</a></td>'
+            f"<td>{lessons}</td><td>{yes + no}</td><td>{no_pct}</td></tr>"
+        )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(INDEX_TEMPLATE.format(style=STYLE, rows="\n".join(rows)))
+
+
+def page_fingerprint(course_df: pd.DataFrame, display_name: str, comments_html: str, modes: Sequence[str]) -> str:
+    """Hash of everything a course page is built from: its lessons, comments, modes, and the page code."""
+    lessons = course_df[FINGERPRINT_COLUMNS].to_csv(index=False)
+    digest = hashlib.sha256()
+    for part in (lessons, display_name, comments_html, json.dumps(list(modes))):
+        digest.update(part.encode("utf-8"))
+    for path in PAGE_CODE:
+        digest.update((file_hash(path) or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def page_is_current(entry, fingerprint: str, slug: str, output_dir: str) -> bool:
+    """
+    Whether a course page recorded in the site manifest (its fingerprint and chart files) was built from the
+    same inputs and still has its page and every chart it links to on disk.
+    """
+    if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint:
+        return False
+    paths = [os.path.join(output_dir, f"{slug}.html")]
+    paths += [os.path.join(output_dir, CHARTS_DIRNAME, chart) for chart in entry.get("charts", [])]
+    return all(os.path.exists(path) for path in paths)
+
+
+def export_site(
+    data_dir: str = DATA_DIR,
+    output_dir: Optional[str] = None,
+    modes: Sequence[str] = SORT_MODES,
+    jobs: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, str]:
+    """
+    Export the aggregates as a static site: <output_dir>/index.html plus one page per course with its charts
+    and comments. Only courses whose page inputs changed since the last export are rebuilt (all of them with
+    force), spread over `jobs` worker processes (None uses every core); pages of courses that disappeared are
+    removed. Records "export_site" stage metrics and returns a mapping of course to "built" or "skipped".
+    """
+    output_dir = output_dir or os.path.join(data_dir, "site")
+    aggregated_csv = os.path.join(data_dir, "aggregated_feedback.csv")
+    parsed_csv = os.path.join(data_dir, "parsed_feedback.csv")
+    manifest_path = os.path.join(output_dir, SITE_MANIFEST_FILENAME)
+
+    with track_stage("export_site") as metrics:
+        agg_df = filter_courses(read_lesson_csv(aggregated_csv))
+        metrics.bytes_read = file_size(aggregated_csv)
+        parsed_df, store = None, None
+        if os.path.exists(parsed_csv):
+            parsed_df = read_parsed_feedback(parsed_csv)
+            metrics.bytes_read += file_size(parsed_csv)
+            if os.path.exists(store_path(parsed_csv)):
+                store = CommentStore.load(store_path(parsed_csv))
+        metrics.rows = len(agg_df)
+
+        course_display_map = build_course_display_map(agg_df)
+        previous = load_manifest(manifest_path)
+        pages, statuses, stale = {}, {}, []
+        for _, course_df in agg_df.groupby("course_id", sort=False):
+            course = course_df["course"].iat[0]
+            display_name = course_display_map[course]
+            comments_html = render_comments_html(
+                None if parsed_df is None else prepare_comments_view(parsed_df, agg_df, course, "chronological", store)
+            )
+            slug = course_slug(course)
+            fingerprint = page_fingerprint(course_df, display_name, comments_html, modes)
+            if not force and page_is_current(previous.get(slug), fingerprint, slug, output_dir):
+                statuses[course] = "skipped"
+                pages[slug] = previous[slug]
+            else:
+                statuses[course] = "built"
+                stale.append((course, display_name, course_df, comments_html))
+                pages[slug] = {"fingerprint": fingerprint}
+
+        os.makedirs(os.path.join(output_dir, CHARTS_DIRNAME), exist_ok=True)
+        if jobs == 1 or len(stale) <= 1:
+            written = [render_course_page(*args, output_dir, modes) for args in stale]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                columns = list(zip(*stale))
+                n = len(stale)
+                written = list(executor.map(render_course_page, *columns, [output_dir] * n, [modes] * n))
+
+        for (course, *_), paths in zip(stale, written):
+            pages[course_slug(course)]["charts"] = [os.path.basename(path) for path in paths if path.endswith(".png")]
+
+        # Drop the pages and charts of courses that are no longer in the data.
+        for slug in set(previous) - set(pages):
+            for path in [os.path.join(output_dir, f"{slug}.html")] + [
+                os.path.join(output_dir, CHARTS_DIRNAME, f"{slug}-{mode}.png") for mode in SORT_MODES
+            ]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        render_index(agg_df, course_display_map, os.path.join(output_dir, "index.html"))
+        save_manifest(pages, manifest_path)
+        metrics.bytes_written = sum(file_size(path) for paths in written for path in paths)
+
+    print(f"Exported {len(stale)} of {len(statuses)} course page(s) to {output_dir} (the rest were unchanged)")
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the aggregated feedback as a static site.")
+    parser.add_argument("--data-dir", type=str, default=DATA_DIR, help="Directory holding the pipeline CSVs")
+    parser.add_argument("--output-dir", type=str, help="Where to write the site (default: <data-dir>/site)")
+    parser.add_argument(
+        "--mode", action="append", choices=SORT_MODES, help="Sorting mode to chart (repeatable; default: all)"
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (default: 0, every core)")
+    parser.add_argument("--force", action="store_true", help="Rebuild every course page")
+    args = parser.parse_args()
+    # Charts are only ever written to files here, so never try to open a GUI backend.
+    plt.switch_backend("Agg")
+
+    export_site(args.data_dir, args.output_dir, args.mode or list(SORT_MODES), args.jobs or None, args.force)
+
+
+if __name__ == "__main__":
+    main()
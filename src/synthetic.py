@@ -0,0 +1,193 @@
+# src/synthetic.py
+
+import argparse
+import html
+import os
+import random
+from typing import List, Optional
+
+# Course names modelled on the real report; extra courses get a numbered suffix.
+BASE_COURSES = [
+    ("Prealgebra 1 Self-Paced", "prealgebra1-sp"),
+    ("Prealgebra 2 Self-Paced", "prealgebra2-sp"),
+    ("Introduction to Algebra A Self-Paced", "algebra-a-sp"),
+    ("Introduction to Counting & Probability Self-Paced", "intro-counting-sp"),
+    ("Introduction to Algebra B Self-Paced", "algebra-b-sp"),
+    ("B2B Prealgebra 1 Self-Paced", "b2b-prealgebra1-sp"),
+    ("B2B Introduction to Algebra A Self-Paced", "b2b-algebra-a-sp"),
+    ("Teacher Training: Math Level 1", "acad-teacher-math-1"),
+]
+
+TITLE_WORDS = [
+    "Fractions",
+    "Exponents",
+    "Linear Equations",
+    "Square Roots",
+    "Negative Numbers",
+    "Ratios",
+    "Percents",
+    "Counting",
+    "Probability",
+    "Inequalities",
+    "Factoring",
+    "Quadratics",
+    "Videos",
+    "Review",
+    "Challenge Problems",
+    "Introduction to",
+    "More",
+    "Multiplication",
+    "Word Problems",
+    "Graphing",
+]
+
+COMMENT_SNIPPETS = [
+    "good",
+    "too hard",
+    "I dont like writing",
+    "Just giving more examples maybe?",
+    "This lesson was really confusing for me.",
+    "Explaining WHY the formulas work would help.",
+    "The hints were useful but the last problem was too hard.",
+    "Make the equations correctly.",
+    "More videos please",
+    "I liked the challenge problems",
+]
+
+CARD_TEMPLATE = """
+            <div class="card mb-4">
+            <div class="card-header">
+                Lesson {chapter}.{section}.{item} {title}<br>
+            </div>
+            <div class="card-body">
+                <p>
+                    {num_responses} students responded<br>
+                    {yes_pct}% 'yes this was helpful';
+                    {no_pct}% 'no this was not helpful'<br>
+{comments}
+                </p>
+            </div>
+            <div class="card-footer">
+                Collection: <a target="_blank" href="/crypt/collection/{collection}/composite">{collection}</a>,
+                Document ID: <a target="_blank" href="/crypt/composite/{collection}/{document_id}">{document_id}</a>,
+                Self-paced ID: {self_paced_id}
+            </div>
+        </div>"""
+
+NO_COMMENTS_LINE = "\t\t\t\t\t\tNone of the 'no' responses had more to say."
+
+
+def course_names(num_courses: int) -> List[tuple]:
+    """Return (course name, slug) pairs, reusing the real course names before inventing new ones."""
+    courses = list(BASE_COURSES[:num_courses])
+    for i in range(len(courses), num_courses):
+        courses.append((f"Synthetic Course {i + 1} Self-Paced", f"synthetic-{i + 1}-sp"))
+    return courses
+
+
+def lesson_title(rng: random.Random) -> str:
+    """Build a plausible lesson title from one to three title words."""
+    return " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+
+
+def render_card(rng: random.Random, chapter: int, section: int, item: int, title: str, ids: dict, max_comments: int):
+    """Render one feedback card using the markup that parse_card expects."""
+    num_responses = rng.randint(1, 500)
+    yes_pct = rng.randint(0, 100)
+    num_comments = rng.randint(0, max_comments) if max_comments else 0
+    if num_comments:
+        comments = "\n".join(
+            f"\t\t\t\t\t\t<i>{html.escape(rng.choice(COMMENT_SNIPPETS))}</i><br>" for _ in range(num_comments)
+        )
+    else:
+        comments = NO_COMMENTS_LINE
+    return CARD_TEMPLATE.format(
+        chapter=chapter,
+        section=section,
+        item=item,
+        title=html.escape(title),
+        num_responses=num_responses,
+        yes_pct=yes_pct,
+        no_pct=100 - yes_pct,
+        comments=comments,
+        collection=ids["collection"],
+        document_id=ids["document_id"],
+        self_paced_id=ids["self_paced_id"],
+    )
+
+
+def generate_feedback_page(
+    num_cards: int,
+    num_courses: int = 5,
+    lessons_per_course: Optional[int] = None,
+    max_comments_per_card: int = 3,
+    seed: int = 0,
+) -> str:
+    """
+    Generate a synthetic self-paced feedback report.
+
+    Cards are spread evenly across num_courses courses. Each course has lessons_per_course distinct lessons
+    (by default just enough for one card per lesson); any extra cards repeat a lesson, with its document id,
+    under a new self-paced id, the way a lesson shows up once per collection in the real report.
+    The same seed always produces the same page.
+    """
+    rng = random.Random(seed)
+    courses = course_names(num_courses)
+    cards_per_course = [
+        num_cards // num_courses + (1 if i < num_cards % num_courses else 0) for i in range(num_courses)
+    ]
+    if lessons_per_course is None:
+        lessons_per_course = max(max(cards_per_course), 1)
+
+    parts = ['<html><head><title>Self-Paced Feedback</title></head><body><div id="main-column">']
+    next_id, next_document_id = 1000, 6000
+    for (course, slug), num_course_cards in zip(courses, cards_per_course):
+        parts.append(f'\n\t\t<h3 class="p-0 m-0">{html.escape(course)}</h3>\n\t\t{slug}\t<p></p>\n')
+        collection = rng.randint(100, 999)
+        # Lay the lessons out as chapters of 4 sections with 10 items each, one document id per lesson.
+        lessons = [
+            (i // 40 + 1, (i // 10) % 4 + 1, i % 10 + 1, lesson_title(rng), next_document_id + i)
+            for i in range(lessons_per_course)
+        ]
+        next_document_id += lessons_per_course
+        for card_num in range(num_course_cards):
+            chapter, section, item, title, document_id = lessons[card_num % lessons_per_course]
+            ids = {"collection": collection, "document_id": document_id, "self_paced_id": next_id}
+            next_id += 1
+            parts.append(render_card(rng, chapter, section, item, title, ids, max_comments_per_card))
+    parts.append("\n</div></body></html>\n")
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic self-paced feedback page.")
+    parser.add_argument("--cards", type=int, default=1000, help="Total number of feedback cards")
+    parser.add_argument("--courses", type=int, default=5, help="Number of courses")
+    parser.add_argument("--lessons", type=int, help="Distinct lessons per course (default: one card per lesson)")
+    parser.add_argument("--comments", type=int, default=3, help="Maximum comments per card")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join("data", "synthetic_feedback_page.html"),
+        help="Output HTML file (default: data/synthetic_feedback_page.html)",
+    )
+    args = parser.parse_args()
+
+    page = generate_feedback_page(
+        args.cards,
+        num_courses=args.courses,
+        lessons_per_course=args.lessons,
+        max_comments_per_card=args.comments,
+        seed=args.seed,
+    )
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(page)
+    print(f"Synthetic page with {args.cards} cards written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# src/views.py
+
+import ast
+from collections import Counter
+from typing import Optional
+
+import pandas as pd
+
+from src.comments import COMMENT_IDS_COLUMN, CommentStore, count_comment_ids
+from src.data_processor import add_no_rate_columns
+from src.parser import add_id_columns, text_id
+
+
+def filter_courses(agg_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Removes rows where the course name contains "Teacher Training" or "B2B".
+    """
+    df = agg_df.copy()
+    df = df[~df["course"].str.contains("Teacher Training", case=False)]
+    df = df[~df["course"].str.contains("B2B", case=False)]
+    return df
+
+
+def clean_course_name(full_name: str) -> str:
+    """
+    Removes 'Self-Paced' from the course name and strips extra whitespace.
+    """
+    return full_name.replace("Self-Paced", "").strip()
+
+
+def build_course_display_map(agg_df: pd.DataFrame) -> dict:
+    """
+    Builds a dictionary mapping the full course name to a 'cleaned' display name
+    (where 'Self-Paced' is removed) from the filtered DataFrame.
+    """
+    # First, filter out unwanted courses.
+    filtered_df = filter_courses(agg_df)
+    unique_courses = filtered_df["course"].unique()
+    return {course: clean_course_name(course) for course in unique_courses}
+
+
+def sort_course_display_names(display_names: list) -> list:
+    """
+    Returns a list of course display names sorted in the preferred order:
+    Prealgebra 1, Prealgebra 2, Algebra A, Intro C&P, Algebra B,
+    followed by any others alphabetically.
+    """
+    preferred_order = [
+        "Prealgebra 1",
+        "Prealgebra 2",
+        "Introduction to Algebra A",
+        "Introduction to Counting & Probability",
+        "Introduction to Algebra B",
+    ]
+    prioritized = [name for name in preferred_order if name in display_names]
+    others = sorted([name for name in display_names if name not in prioritized])
+    return prioritized + others
+
+
+def get_course_full_name(display_name: str, course_display_map: dict) -> str:
+    """
+    Given a cleaned display name, returns the original full course name
+    from the provided dictionary. Returns None if no match is found.
+    """
+    for full_name, cleaned_name in course_display_map.items():
+        if cleaned_name == display_name:
+            return full_name
+    return None
+
+
+def combine_comment_lists(series):
+    """Given a series of stringified comment lists, parse each and combine them into one list."""
+    combined = []
+    for item in series:
+        try:
+            c_list = ast.literal_eval(item)
+            if isinstance(c_list, list) and c_list:
+                combined.extend(c_list)
+        except Exception:
+            pass
+    return combined
+
+
+def count_lesson_comments(series, store: Optional[CommentStore] = None) -> list:
+    """
+    Given a lesson's cards, returns (comment text, times written) pairs in first-seen order. The series holds
+    comment ids resolved through store if one is given, otherwise stringified comment lists.
+    """
+    if store is not None:
+        return [(store.text(key), count) for key, count in count_comment_ids(series)]
+    return list(Counter(combine_comment_lists(series)).items())
+
+
+def prepare_comments_view(
+    parsed_df: pd.DataFrame, agg_df: pd.DataFrame, course: str, mode: str, store: Optional[CommentStore] = None
+) -> pd.DataFrame:
+    """
+    Builds the table behind the "Detailed Comments" tab: one row per lesson of the given course with its
+    distinct comments, how many times each was written (comment_counts), and numeric info
+    (chapter_num, section_num, no_pct), sorted according to mode.
+
+    parsed_df either references comments by id (pass the CommentStore holding their texts) or holds
+    stringified comment lists in its comments column. Parsed data written before lessons were keyed on ids
+    gets its id columns added here.
+    """
+    course_id = text_id(course)
+    if "lesson_id" not in parsed_df.columns:
+        parsed_df = add_id_columns(parsed_df.copy())
+
+    # Filter by selected course and remove lessons with "feedback" in title.
+    course_feedback = parsed_df[parsed_df["course_id"] == course_id]
+    course_feedback = course_feedback[~course_feedback["lesson_title"].str.contains("feedback", case=False, na=False)]
+
+    # Group by lesson id and combine comments, keeping each distinct text once.
+    column = COMMENT_IDS_COLUMN if store is not None else "comments"
+    grouped_comments = (
+        course_feedback.groupby("lesson_id")[column]
+        .apply(count_lesson_comments, store=store)
+        .rename("comments")
+        .reset_index()
+    )
+    grouped_comments["comment_counts"] = grouped_comments["comments"].map(lambda pairs: [n for _, n in pairs])
+    grouped_comments["comments"] = grouped_comments["comments"].map(lambda pairs: [text for text, _ in pairs])
+
+    # Group the course's aggregated data by lesson id to get numeric info (chapter_num, section_num, etc.)
+    grouped_agg = (
+        agg_df[agg_df["course_id"] == course_id]
+        .groupby("lesson_id")
+        .agg(
+            {"lesson_title": "first", "chapter_num": "min", "section_num": "min", "yes_count": "sum", "no_count": "sum"}
+        )
+        .reset_index()
+    )
+    add_no_rate_columns(grouped_agg)
+
+    # Merge the grouped comments with the numeric aggregated data.
+    merged = pd.merge(grouped_comments, grouped_agg, on="lesson_id", how="inner")
+
+    # Sort the merged DataFrame according to mode.
+    if mode == "worst-to-best":
+        merged = merged.sort_values("no_pct", ascending=False)
+    elif mode == "confidence-ranked":
+        merged = merged.sort_values(["no_ci_low", "no_pct"], ascending=False)
+    elif mode == "chronological":
+        merged = merged.sort_values(["chapter_num", "section_num"])
+    else:
+        merged = merged.sort_values("lesson_title")
+    return merged
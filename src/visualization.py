@@ -2,29 +2,44 @@
 
 import argparse
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
 
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from src.data_processor import add_no_rate_columns, read_lesson_csv
+from src.metrics import file_size, track_stage
+from src.parser import text_id
+from src.profiling import profile_stage
+
+# Sorting modes understood by sort_and_label_lessons.
+SORT_MODES = ("chronological", "worst-to-best", "confidence-ranked")
+
 
 def sort_and_label_lessons(course_df: pd.DataFrame, mode: str = "chronological") -> pd.DataFrame:
     """
-    Groups the course_df by lesson_title (if necessary) and sorts/labels the lessons based on the mode.
+    Groups the course_df by lesson (lesson_id) to collapse duplicate cards and sorts/labels the lessons
+    based on the mode.
 
     For "chronological" mode, sorts by chapter_num and section_num and labels as "chapter.section Lesson Title".
     For "worst-to-best" mode, sorts by descending no_pct and appends the no percentage to the label.
+    For "confidence-ranked" mode, sorts by the descending lower bound of the 95% interval on the no percentage,
+    so lessons with few responses don't outrank well-measured ones, and appends the interval to the label.
 
     Returns the modified DataFrame with a new column "lesson_label".
     """
-    # Group by lesson_title to collapse duplicates.
+    # Group by lesson id to collapse duplicates; the title is only a label.
     grouped = (
-        course_df.groupby("lesson_title")
-        .agg({"chapter_num": "min", "section_num": "min", "yes_count": "sum", "no_count": "sum"})
+        course_df.groupby(["course_id", "lesson_id"], sort=False)
+        .agg(
+            {"lesson_title": "first", "chapter_num": "min", "section_num": "min", "yes_count": "sum", "no_count": "sum"}
+        )
         .reset_index()
     )
 
-    total_counts = grouped["yes_count"] + grouped["no_count"]
-    grouped["no_pct"] = (grouped["no_count"] / total_counts) * 100
+    add_no_rate_columns(grouped)
 
     if mode == "worst-to-best":
         grouped = grouped.sort_values("no_pct", ascending=False)
@@ -38,6 +53,20 @@ def sort_and_label_lessons(course_df: pd.DataFrame, mode: str = "chronological")
             + grouped["no_pct"].round(1).astype(str)
             + "% no)"
         )
+    elif mode == "confidence-ranked":
+        grouped = grouped.sort_values(["no_ci_low", "no_pct"], ascending=False)
+        grouped["lesson_label"] = (
+            grouped["chapter_num"].astype(str)
+            + "."
+            + grouped["section_num"].astype(str)
+            + " "
+            + grouped["lesson_title"]
+            + " ("
+            + grouped["no_ci_low"].round(1).astype(str)
+            + "-"
+            + grouped["no_ci_high"].round(1).astype(str)
+            + "% no)"
+        )
     elif mode == "chronological":
         grouped = grouped.sort_values(["chapter_num", "section_num"])
         grouped["lesson_label"] = (
@@ -58,8 +87,10 @@ def plot_stacked_bar(agg_df, course, output_filename=None, mode="chronological")
     """
     Filters agg_df by course, applies sort_and_label_lessons() to generate lesson labels,
     then plots the bar chart.
+
+    Returns the labeled lesson DataFrame that was plotted, or None if there was nothing to plot.
     """
-    course_df = agg_df[agg_df["course"] == course].copy()
+    course_df = agg_df[agg_df["course_id"] == text_id(course)].copy()
     if course_df.empty:
         print(f"No data available for course '{course}'")
         return
@@ -95,6 +126,65 @@ def plot_stacked_bar(agg_df, course, output_filename=None, mode="chronological")
         plt.savefig(output_filename)
         print(f"Plot saved to {output_filename}")
 
+    return labeled
+
+
+def plot_rollup(children: pd.DataFrame, title: str):
+    """
+    Plots the yes/no totals of one drill-down level of the rollup cube (e.g. the chapters of a course)
+    as a stacked bar chart labelled by the cube's labels. Returns children, or None if it is empty.
+    """
+    if children is None or children.empty:
+        print(f"No data available for '{title}'")
+        return
+
+    plt.figure(figsize=(15, 6))
+    plt.bar(children["label"], children["yes_count"], label="Yes", color="blue")
+    plt.bar(children["label"], children["no_count"], bottom=children["yes_count"], label="No", color="red")
+
+    plt.ylabel("Number of Responses", fontsize=10)
+    plt.title(title, fontsize=12)
+    plt.xticks(rotation=45, ha="right", fontsize=8)
+    plt.yticks(fontsize=8)
+    plt.legend(fontsize=9)
+    plt.tight_layout()
+    return children
+
+
+def course_slug(course: str) -> str:
+    """File-name-safe version of a course name, e.g. "Prealgebra 1 Self-Paced" -> "prealgebra-1-self-paced"."""
+    return re.sub(r"[^a-z0-9]+", "-", course.lower()).strip("-")
+
+
+def render_course(course: str, course_df: pd.DataFrame, output_dir: str, modes: Sequence[str]) -> List[str]:
+    """Save one chart per mode for a course as <output_dir>/<course-slug>-<mode>.png and return the paths."""
+    paths = []
+    for mode in modes:
+        path = os.path.join(output_dir, f"{course_slug(course)}-{mode}.png")
+        if plot_stacked_bar(course_df, course, output_filename=path, mode=mode) is not None:
+            paths.append(path)
+        plt.close("all")
+    return paths
+
+
+def render_all_courses(
+    agg_df: pd.DataFrame, output_dir: str, modes: Sequence[str] = SORT_MODES, jobs: Optional[int] = None
+) -> Dict[str, List[str]]:
+    """
+    Render every course's charts into output_dir, spreading the courses over `jobs` worker processes
+    (None uses every core). Returns the chart paths written for each course.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    slices = [course_df for _, course_df in agg_df.groupby("course_id", sort=False)]
+    courses = [course_df["course"].iat[0] for course_df in slices]
+    if jobs == 1 or len(courses) <= 1:
+        results = [render_course(course, df, output_dir, modes) for course, df in zip(courses, slices)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            n = len(courses)
+            results = list(executor.map(render_course, courses, slices, [output_dir] * n, [modes] * n))
+    return dict(zip(courses, results))
+
 
 def main():
     parser = argparse.ArgumentParser(description="Plot feedback for a specific course.")
@@ -107,13 +197,22 @@ def main():
         help="Path to the aggregated CSV file (default: data/aggregated_feedback.csv)",
     )
     parser.add_argument(
-        "--mode", type=str, default="chronological", help="Sorting mode: chronological or worst-to-best"
+        "--mode",
+        type=str,
+        default="chronological",
+        help="Sorting mode: chronological, worst-to-best, or confidence-ranked",
     )
+    parser.add_argument("--profile", action="store_true", help="Capture a cProfile/tracemalloc profile of rendering")
 
     args = parser.parse_args()
 
-    agg_df = pd.read_csv(args.data)
-    plot_stacked_bar(agg_df, args.course, output_filename=args.output, mode=args.mode)
+    with track_stage("render") as metrics, profile_stage("render", enabled=args.profile or None):
+        agg_df = read_lesson_csv(args.data)
+        metrics.bytes_read = file_size(args.data)
+        labeled = plot_stacked_bar(agg_df, args.course, output_filename=args.output, mode=args.mode)
+        metrics.rows = 0 if labeled is None else len(labeled)
+        if args.output:
+            metrics.bytes_written = file_size(args.output)
 
 
 if __name__ == "__main__":
@@ -11,7 +11,6 @@ if parent_dir not in sys.path:
 # (Optional) Debug print to check that the parent directory is included:
 print("Updated sys.path:", sys.path)
 
-import subprocess
 from io import BytesIO
 
 import matplotlib.pyplot as plt
@@ -19,37 +18,46 @@ import pandas as pd
 import streamlit as st
 
 import streamlit_app.bootstrap as bootstrap  # noqa: F401
-from src.visualization import plot_stacked_bar
+from src import pipeline
+from src.comments import CommentStore, read_parsed_feedback, store_path
+from src.data_processor import (
+    RANKING_KEY,
+    OutdatedDataError,
+    read_lesson_csv,
+    rollup_lookup,
+    top_worst_lessons,
+)
+from src.metrics import RUN_ID_ENV_VAR, file_size, new_run_id, read_metrics, track_stage
+from src.parser import text_id
+from src.profiling import profile_stage
+from src.visualization import SORT_MODES, plot_rollup, plot_stacked_bar
 from streamlit_app.utils import (
     build_course_display_map,
-    combine_comment_lists,
+    clean_course_name,
     filter_courses,
     get_course_full_name,
+    prepare_comments_view,
     sort_course_display_names,
+    summarize_metrics,
 )
 
+# Number of most recent metrics records summarized in the sidebar.
+METRICS_PANEL_LIMIT = 500
+PROFILE_TOGGLE_KEY = "profile_reruns"
+LEADERBOARD_VIEW = "Worst Lessons Overall"
+VIEWS = ("Course Feedback", LEADERBOARD_VIEW)
+
 
 def run_pipeline():
     st.info("Running pipeline: scraping, parsing, and aggregating data.")
-
-    result_scraper = subprocess.run([sys.executable, "src/scraper.py"], capture_output=True, text=True)
-    if result_scraper.returncode != 0:
-        st.error("Scraper failed:\n" + result_scraper.stderr)
-        return False
-    st.info("Scraping complete.")
-
-    result_parser = subprocess.run([sys.executable, "src/parser.py"], capture_output=True, text=True)
-    if result_parser.returncode != 0:
-        st.error("Parser failed:\n" + result_parser.stderr)
-        return False
-    st.info("Parsing complete.")
-
-    result_aggregator = subprocess.run([sys.executable, "src/data_processor.py"], capture_output=True, text=True)
-    if result_aggregator.returncode != 0:
-        st.error("Aggregation failed:\n" + result_aggregator.stderr)
+    # Give this pipeline run its own id so its stage metrics are grouped together.
+    os.environ[RUN_ID_ENV_VAR] = new_run_id()
+    try:
+        # Stages whose inputs and code are unchanged since the last run are skipped.
+        pipeline.run_pipeline(log=st.info)
+    except Exception as e:
+        st.error(f"Pipeline failed: {e}")
         return False
-    st.info("Aggregation complete.")
-
     return True
 
 
@@ -62,9 +70,155 @@ def get_plot_image(agg_df, course, mode):
     return buf
 
 
-def main():
-    # Must be the first Streamlit call
-    st.set_page_config(layout="wide")
+def get_rollup_image(children, title):
+    plot_rollup(children, title)
+    buf = BytesIO()
+    plt.savefig(buf, format="png", bbox_inches="tight")
+    plt.close()
+    buf.seek(0)
+    return buf
+
+
+def show_course_alerts(course):
+    """Warn about lessons of the course whose "no" rate changed significantly since the previous data update."""
+    alerts_path = os.path.join("data", "alerts.csv")
+    if not os.path.exists(alerts_path):
+        return
+    try:
+        alerts = read_lesson_csv(alerts_path)
+    except OutdatedDataError as e:
+        st.warning(str(e))
+        return
+    course_alerts = alerts[alerts["course_id"] == text_id(course)]
+    if course_alerts.empty:
+        return
+    with st.expander(f"⚠️ {len(course_alerts)} lesson(s) changed significantly since the last update"):
+        for _, row in course_alerts.iterrows():
+            st.write(
+                f"{row['chapter_num']}.{row['section_num']} {row['lesson_title']}: "
+                f"{row['previous_no_pct']:.1f}% no before, {row['new_no_pct']:.1f}% of "
+                f"{row['new_responses']} new responses ({row['direction']}, now {row['current_no_pct']:.1f}%)"
+            )
+
+
+def show_metrics_panel(capture=None):
+    """Summarize recent pipeline and rerun timings in the sidebar, with the profiling toggle."""
+    with st.sidebar.expander("Performance Metrics"):
+        summary = summarize_metrics(read_metrics(limit=METRICS_PANEL_LIMIT))
+        if summary.empty:
+            st.write("No metrics recorded yet.")
+        else:
+            st.dataframe(summary, hide_index=True)
+
+        # Read at the start of the next rerun, so toggling it profiles that rerun.
+        st.checkbox(
+            "Profile reruns",
+            key=PROFILE_TOGGLE_KEY,
+            help="Capture cProfile and tracemalloc output for each rerun while enabled.",
+        )
+        if capture is not None:
+            st.caption(f"Profile saved to {capture.prof_path}")
+            with open(capture.prof_path, "rb") as f:
+                st.download_button("Download .prof", data=f.read(), file_name=os.path.basename(capture.prof_path))
+            with open(capture.alloc_path, "r", encoding="utf-8") as f:
+                st.text(f.read())
+
+
+@st.cache_resource
+def load_lesson_ranking(path, modified_time):
+    """Load the precomputed lesson ranking once per file version (modified_time is part of the cache key)."""
+    return filter_courses(pd.read_csv(path))
+
+
+@st.cache_resource
+def load_comment_store(path, modified_time):
+    """Load the comment store once per file version (modified_time is part of the cache key)."""
+    return CommentStore.load(path)
+
+
+@st.cache_resource
+def load_rollup_lookup(path, modified_time):
+    """Load the rollup cube and index it by drill-down parent once per file version."""
+    return rollup_lookup(pd.read_csv(path))
+
+
+def render_drilldown(course, display_name, run_id):
+    """Chapter totals of the course, expandable into a chapter's sections and a section's lessons."""
+    rollup_path = os.path.join("data", "rollup_cube.csv")
+    if not os.path.exists(rollup_path):
+        st.info("Rollup data not found. Please run the pipeline.")
+        return
+    lookup = load_rollup_lookup(rollup_path, os.path.getmtime(rollup_path))
+
+    path = (text_id(course),)
+    title = display_name
+    # Each level is one dictionary lookup; stop when nothing is selected or there is nothing below.
+    for level, child_key in (("chapter", "chapter_num"), ("section", "section_num"), ("lesson", None)):
+        children = lookup.get(path)
+        if children is None:
+            st.info("No lessons to show.")
+            return
+        with track_stage("app_drilldown", run_id=run_id) as drilldown_metrics:
+            image = get_rollup_image(children, f"{title} by {level}")
+            drilldown_metrics.rows = len(children)
+        st.image(image, use_container_width=True)
+        if child_key is None:
+            return
+        labels = dict(zip(children[child_key].tolist(), children["label"]))
+        selected = st.selectbox(
+            f"Expand a {level}",
+            [None] + list(labels),
+            format_func=lambda key, labels=labels: labels.get(key, "—"),
+            # Keyed by the parent, so a selection resets when the course or a higher level changes.
+            key=f"drill_{level}_" + "_".join(map(str, path)),
+        )
+        if selected is None:
+            return
+        path += (selected,)
+        title = f"{display_name} {labels[selected]}"
+
+
+def format_comment(text, count):
+    """A comment as shown in the comments tab, with "×N" when it was written more than once."""
+    return f"{text} ×{count}" if count > 1 else text
+
+
+def render_leaderboard(run_id):
+    """Top N worst lessons across every course, answered from the precomputed ranking index."""
+    ranking_path = os.path.join("data", "lesson_ranking.csv")
+    if not os.path.exists(ranking_path):
+        st.info("Lesson ranking not found. Please run the pipeline.")
+        return
+    ranking = load_lesson_ranking(ranking_path, os.path.getmtime(ranking_path))
+
+    families = sorted(ranking["course_family"].unique())
+    selected_families = st.sidebar.multiselect("Course Families", families, help="Leave empty to include all.")
+    min_responses = st.sidebar.number_input("Minimum Responses", min_value=0, value=20, step=5)
+    top_n = st.sidebar.slider("Number of Lessons", min_value=5, max_value=100, value=20, step=5)
+    rank_by = st.sidebar.radio(
+        "Rank By",
+        (RANKING_KEY, "no_pct"),
+        format_func=lambda key: "Confidence lower bound" if key == RANKING_KEY else "Raw no percentage",
+    )
+
+    with track_stage("app_leaderboard", run_id=run_id) as leaderboard_metrics:
+        top = top_worst_lessons(ranking, top_n, selected_families, min_responses, by=rank_by)
+        leaderboard_metrics.rows = len(ranking)
+
+    st.header(f"Top {top_n} Worst Lessons Overall")
+    table = pd.DataFrame(
+        {
+            "Course": top["course"].map(clean_course_name),
+            "Lesson": top["chapter_num"].astype(str) + "." + top["section_num"].astype(str) + " " + top["lesson_title"],
+            "Responses": top["responses"],
+            "No %": top["no_pct"].round(1),
+            "95% Interval": top["no_ci_low"].round(1).astype(str) + "-" + top["no_ci_high"].round(1).astype(str),
+        }
+    )
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+
+def render_app(run_id, metrics):
     st.title("Self-Paced Feedback Visualization")
 
     if st.button("Scrape & Update Data"):
@@ -78,7 +232,13 @@ def main():
     if not os.path.exists(data_path):
         st.error(f"Aggregated data not found at {data_path}. Please run the pipeline first.")
         return
-    agg_df = pd.read_csv(data_path)
+    try:
+        agg_df = read_lesson_csv(data_path)
+    except OutdatedDataError as e:
+        st.error(str(e))
+        return
+    metrics.bytes_read += file_size(data_path)
+    metrics.rows = len(agg_df)
 
     # Filter and build course mapping.
     agg_df = filter_courses(agg_df)
@@ -86,26 +246,40 @@ def main():
     display_names = sort_course_display_names(list(course_display_map.values()))
 
     st.sidebar.header("Visualization Options")
+    view = st.sidebar.radio("View", VIEWS, index=0)
+    if view == LEADERBOARD_VIEW:
+        render_leaderboard(run_id)
+        return
+
     selected_display_name = st.sidebar.selectbox("Select a Course", display_names)
     selected_course = get_course_full_name(selected_display_name, course_display_map)
     if selected_course is None:
         st.warning("No matching course found. Using first available course.")
         selected_course = list(course_display_map.keys())[0]
+    course_rows = agg_df["course_id"] == text_id(selected_course)
 
     mode = st.sidebar.radio(
         "Select Sorting Mode",
-        ("chronological", "worst-to-best"),
+        SORT_MODES,
         index=0,
-        help="Chronological sorts by chapter, section, and item; Worst-to-best sorts by descending no percentage.",
+        help=(
+            "Chronological sorts by chapter, section, and item; Worst-to-best sorts by descending no percentage; "
+            "Confidence-ranked sorts by the lower bound of the 95% interval on the no percentage, "
+            "so lessons with only a few responses don't outrank well-measured ones."
+        ),
     )
 
     st.header(f"Feedback for {selected_display_name} ({mode.replace('-', ' ').capitalize()} Mode)")
+    show_course_alerts(selected_course)
 
     # Use Streamlit tabs to separate the chart from the comments.
-    tab1, tab2 = st.tabs(["Visualization", "Detailed Comments"])
+    tab1, tab2, tab3 = st.tabs(["Visualization", "Detailed Comments", "Drill-down"])
 
     with tab1:
-        plot_image = get_plot_image(agg_df, selected_course, mode)
+        with track_stage("app_plot", run_id=run_id) as plot_metrics:
+            plot_image = get_plot_image(agg_df, selected_course, mode)
+            plot_metrics.rows = int(course_rows.sum())
+            plot_metrics.bytes_written = plot_image.getbuffer().nbytes
         st.image(plot_image, use_container_width=True)
         st.download_button(
             label="Download Plot as PNG",
@@ -118,37 +292,15 @@ def main():
         st.subheader("Student Feedback Comments")
         parsed_path = os.path.join("data", "parsed_feedback.csv")
         if os.path.exists(parsed_path):
-            parsed_df = pd.read_csv(parsed_path)
-            # Filter by selected course and remove lessons with "feedback" in title.
-            course_feedback = parsed_df[parsed_df["course"] == selected_course]
-            course_feedback = course_feedback[
-                ~course_feedback["lesson_title"].str.contains("feedback", case=False, na=False)
-            ]
-
-            # Group by lesson_title and combine comments.
-            grouped_comments = (
-                course_feedback.groupby("lesson_title")["comments"].apply(combine_comment_lists).reset_index()
-            )
-
-            # Group the aggregated data by lesson_title to get numeric info (chapter_num, section_num, etc.)
-            grouped_agg = (
-                agg_df.groupby("lesson_title")
-                .agg({"chapter_num": "min", "section_num": "min", "yes_count": "sum", "no_count": "sum"})
-                .reset_index()
-            )
-            total_counts = grouped_agg["yes_count"] + grouped_agg["no_count"]
-            grouped_agg["no_pct"] = (grouped_agg["no_count"] / total_counts) * 100
-
-            # Merge the grouped comments with the numeric aggregated data.
-            merged = pd.merge(grouped_comments, grouped_agg, on="lesson_title", how="inner")
-
-            # Sort the merged DataFrame according to mode.
-            if mode == "worst-to-best":
-                merged = merged.sort_values("no_pct", ascending=False)
-            elif mode == "chronological":
-                merged = merged.sort_values(["chapter_num", "section_num"])
-            else:
-                merged = merged.sort_values("lesson_title")
+            with track_stage("app_comments", run_id=run_id) as comments_metrics:
+                parsed_df = read_parsed_feedback(parsed_path)
+                comments_metrics.bytes_read = file_size(parsed_path)
+                comments_metrics.rows = len(parsed_df)
+                comments_path = store_path(parsed_path)
+                store = None
+                if os.path.exists(comments_path):
+                    store = load_comment_store(comments_path, os.path.getmtime(comments_path))
+                merged = prepare_comments_view(parsed_df, agg_df, selected_course, mode, store)
 
             # Display each lesson's combined comments in a single expander.
             for _, row in merged.iterrows():
@@ -158,18 +310,31 @@ def main():
                 # Skip if there are no comments.
                 if not comment_list:
                     continue
-                # Join the individual responses with a double newline for readability.
-                comments_text = "\n\n".join(comment_list)
+                # Show each distinct response once, joined with a double newline for readability.
+                comments_text = "\n\n".join(map(format_comment, comment_list, row["comment_counts"]))
                 with st.expander(lesson_label):
                     st.write(comments_text)
         else:
             st.info("Parsed feedback data not found. Please run the pipeline.")
 
+    with tab3:
+        render_drilldown(selected_course, selected_display_name, run_id)
+
     # Also display aggregated data table if desired.
     st.subheader("Aggregated Data")
-    filtered_df = agg_df[agg_df["course"] == selected_course]
+    filtered_df = agg_df[course_rows]
     st.dataframe(filtered_df)
 
 
+def main():
+    # Must be the first Streamlit call
+    st.set_page_config(layout="wide")
+    run_id = new_run_id()
+    profile = st.session_state.get(PROFILE_TOGGLE_KEY, False) or None
+    with track_stage("app_rerun", run_id=run_id) as metrics, profile_stage("app_rerun", enabled=profile) as capture:
+        render_app(run_id, metrics)
+    show_metrics_panel(capture)
+
+
 if __name__ == "__main__":
     main()
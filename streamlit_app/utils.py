@@ -1,73 +1,58 @@
-import ast
-
 import pandas as pd
 
-
-def filter_courses(agg_df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Removes rows where the course name contains "Teacher Training" or "B2B".
-    """
-    df = agg_df.copy()
-    df = df[~df["course"].str.contains("Teacher Training", case=False)]
-    df = df[~df["course"].str.contains("B2B", case=False)]
-    return df
-
-
-def clean_course_name(full_name: str) -> str:
-    """
-    Removes 'Self-Paced' from the course name and strips extra whitespace.
-    """
-    return full_name.replace("Self-Paced", "").strip()
-
-
-def build_course_display_map(agg_df: pd.DataFrame) -> dict:
-    """
-    Builds a dictionary mapping the full course name to a 'cleaned' display name
-    (where 'Self-Paced' is removed) from the filtered DataFrame.
-    """
-    # First, filter out unwanted courses.
-    filtered_df = filter_courses(agg_df)
-    unique_courses = filtered_df["course"].unique()
-    return {course: clean_course_name(course) for course in unique_courses}
-
-
-def sort_course_display_names(display_names: list) -> list:
-    """
-    Returns a list of course display names sorted in the preferred order:
-    Prealgebra 1, Prealgebra 2, Algebra A, Intro C&P, Algebra B,
-    followed by any others alphabetically.
-    """
-    preferred_order = [
-        "Prealgebra 1",
-        "Prealgebra 2",
-        "Introduction to Algebra A",
-        "Introduction to Counting & Probability",
-        "Introduction to Algebra B",
-    ]
-    prioritized = [name for name in preferred_order if name in display_names]
-    others = sorted([name for name in display_names if name not in prioritized])
-    return prioritized + others
-
-
-def get_course_full_name(display_name: str, course_display_map: dict) -> str:
-    """
-    Given a cleaned display name, returns the original full course name
-    from the provided dictionary. Returns None if no match is found.
-    """
-    for full_name, cleaned_name in course_display_map.items():
-        if cleaned_name == display_name:
-            return full_name
-    return None
-
-
-def combine_comment_lists(series):
-    """Given a series of stringified comment lists, parse each and combine them into one list."""
-    combined = []
-    for item in series:
-        try:
-            c_list = ast.literal_eval(item)
-            if isinstance(c_list, list) and c_list:
-                combined.extend(c_list)
-        except Exception:
-            pass
-    return combined
+# The course-name and comments-view helpers live in src.views, shared with the API and the static site export.
+from src.views import (
+    build_course_display_map,
+    clean_course_name,
+    combine_comment_lists,
+    count_lesson_comments,
+    filter_courses,
+    get_course_full_name,
+    prepare_comments_view,
+    sort_course_display_names,
+)
+
+__all__ = [
+    "build_course_display_map",
+    "clean_course_name",
+    "combine_comment_lists",
+    "count_lesson_comments",
+    "filter_courses",
+    "get_course_full_name",
+    "prepare_comments_view",
+    "sort_course_display_names",
+    "summarize_metrics",
+]
+
+
+def summarize_metrics(records: list) -> pd.DataFrame:
+    """
+    Summarizes stage metrics records (as read from the metrics file) into one row per stage:
+    run count, latest and mean wall time, latest rows/bytes, and the highest stage peak memory and
+    memory growth seen.
+    """
+    columns = ["stage", "runs", "last_seconds", "mean_seconds", "last_rows", "last_bytes_read", "last_bytes_written"]
+    if not records:
+        return pd.DataFrame(columns=columns + ["peak_rss_mb", "max_rss_growth_mb"])
+    df = pd.DataFrame(records)
+    # Records from before memory was measured per stage don't have it; they are left out of the maximum.
+    for column in ("stage_peak_rss_kb", "rss_growth_kb"):
+        if column not in df.columns:
+            df[column] = float("nan")
+    summary = (
+        df.groupby("stage", sort=False)
+        .agg(
+            runs=("wall_seconds", "size"),
+            last_seconds=("wall_seconds", "last"),
+            mean_seconds=("wall_seconds", "mean"),
+            last_rows=("rows", "last"),
+            last_bytes_read=("bytes_read", "last"),
+            last_bytes_written=("bytes_written", "last"),
+            stage_peak_rss_kb=("stage_peak_rss_kb", "max"),
+            rss_growth_kb=("rss_growth_kb", "max"),
+        )
+        .reset_index()
+    )
+    summary["peak_rss_mb"] = (summary.pop("stage_peak_rss_kb") / 1024).round(1)
+    summary["max_rss_growth_mb"] = (summary.pop("rss_growth_kb") / 1024).round(1)
+    return summary
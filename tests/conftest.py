@@ -0,0 +1,14 @@
+import os
+import shutil
+
+import pytest
+
+FIXTURE_HTML = os.path.join(os.path.dirname(__file__), "fixtures", "feedback_page.html")
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """A data directory holding a copy of the real report page, with metrics writing turned off."""
+    monkeypatch.setenv("SP_FEEDBACK_METRICS", "")
+    shutil.copy(FIXTURE_HTML, tmp_path / "feedback_page.html")
+    return tmp_path
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from src.alerts import alerts_file, detect_alerts
+from src.parser import add_id_columns
+
+
+def make_agg(no_counts, yes_counts):
+    df = pd.DataFrame(
+        {
+            "course": ["Course A", "Course A", "Course B", "Course B", "Course B"],
+            "chapter_num": [1, 1, 2, 2, 2],
+            "section_num": [1, 2, 1, 2, 3],
+            "item_num": [1, 1, 1, 1, 1],
+            "lesson_title": ["Stable", "Jumped", "Small", "Diluted", "Quiet"],
+            "yes_count": yes_counts,
+            "no_count": no_counts,
+        }
+    )
+    return add_id_columns(df)
+
+
+def test_detect_alerts_tests_new_responses_of_cumulative_counts():
+    previous = make_agg(no_counts=[20, 20, 0, 100, 10], yes_counts=[180, 180, 2, 900, 10])
+    current = make_agg(no_counts=[22, 120, 2, 150, 10], yes_counts=[198, 200, 2, 900, 10])
+
+    alerts = detect_alerts(previous, current)
+    # "Small" got 2 "no" answers after 2 "yes" ones, which is not significant. "Diluted" only moved from 10% to
+    # 14% overall, but all 50 new responses were "no". "Quiet" has no new responses.
+    assert alerts["lesson_title"].tolist() == ["Diluted", "Jumped"]
+    row = alerts.set_index("lesson_title").loc["Jumped"]
+    assert row["direction"] == "worse"
+    assert row["previous_no_pct"] == 10
+    assert row["new_responses"] == 120
+    assert round(row["new_no_pct"], 1) == 83.3
+    assert row["current_no_pct"] == 37.5
+    assert row["z_score"] > 3.29
+
+
+def test_alerts_file_without_previous_aggregate(tmp_path, monkeypatch):
+    monkeypatch.setenv("SP_FEEDBACK_METRICS", "")
+    current_csv = tmp_path / "aggregated_feedback.csv"
+    make_agg([1] * 5, [1] * 5).to_csv(current_csv, index=False)
+
+    alerts = alerts_file(str(tmp_path / "missing.csv"), str(current_csv), str(tmp_path / "alerts.csv"))
+    assert alerts.empty
+    assert pd.read_csv(tmp_path / "alerts.csv").empty
@@ -0,0 +1,128 @@
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+import pandas as pd
+import pytest
+
+from src.api import FeedbackService, accepts_gzip, make_server
+from src.data_processor import OutdatedDataError, aggregate_by_lesson
+from src.parser import add_id_columns, parse_feedback
+from tests.test_parser import MULTI_COURSE_SAMPLE
+
+
+@pytest.fixture(scope="module")
+def service():
+    parsed_df = parse_feedback(MULTI_COURSE_SAMPLE)
+    agg_df = aggregate_by_lesson(parsed_df)
+    # The service reads parsed data back from CSV, where comment lists are stored as strings.
+    parsed_df = parsed_df.assign(comments=["['too hard']", "[]", "['good', 'more please']"])
+    return FeedbackService(agg_df, parsed_df)
+
+
+def test_courses_and_lessons(service):
+    courses = json.loads(service.get("/courses").body)["courses"]
+    assert {c["display_name"] for c in courses} == {"Prealgebra 1", "B2B Prealgebra 1", "Prealgebra 2"}
+
+    # Courses can be addressed by full or display name.
+    full = json.loads(service.get("/courses/" + quote("Prealgebra 2 Self-Paced") + "/lessons").body)
+    display = json.loads(service.get("/courses/" + quote("Prealgebra 2") + "/lessons").body)
+    assert full == display
+    assert full["lessons"][0]["lesson_title"] == "Introduction to Square Roots"
+
+    worst = json.loads(service.get("/courses/Prealgebra%202/lessons", "mode=worst-to-best").body)
+    assert "% no)" in worst["lessons"][0]["lesson_label"]
+
+
+def test_comments_and_errors(service):
+    comments = json.loads(service.get("/courses/Prealgebra%202/comments").body)
+    assert comments["lessons"][0]["comments"] == ["good", "more please"]
+
+    assert service.get("/courses/Nope/lessons").status == 404
+    assert service.get("/courses/Prealgebra%202/lessons", "mode=sideways").status == 400
+    assert service.get("/unknown").status == 404
+
+
+def test_responses_are_cached(service):
+    assert service.get("/courses") is service.get("/courses/")
+
+
+def test_http_etag_and_gzip(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def get(**headers):
+        try:
+            with urllib.request.urlopen(urllib.request.Request(base + "/courses", headers=headers)) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, b""
+
+    try:
+        status, headers, body = get(**{"Accept-Encoding": "gzip"})
+        assert headers["Content-Encoding"] == "gzip"
+        gzip_etag = headers["ETag"]
+        assert len(json.loads(gzip.decompress(body))["courses"]) == 3
+
+        status, headers, body = get(**{"Accept-Encoding": "gzip;q=0"})
+        assert headers["Content-Encoding"] is None
+        assert len(json.loads(body)["courses"]) == 3
+        # Each encoding has its own strong validator.
+        etag = headers["ETag"]
+        assert etag != gzip_etag
+
+        assert get(**{"If-None-Match": etag})[0] == 304
+        assert get(**{"If-None-Match": gzip_etag})[0] == 200
+        assert get(**{"If-None-Match": gzip_etag, "Accept-Encoding": "gzip"})[0] == 304
+        # Lists, weak tags, and "*" are understood too.
+        assert get(**{"If-None-Match": f'"other", W/{etag}'})[0] == 304
+        assert get(**{"If-None-Match": "*"})[0] == 304
+        assert get(**{"If-None-Match": '"other"'})[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_agg():
+    return pd.DataFrame(
+        {
+            "course": ["C"],
+            "chapter_num": [1],
+            "section_num": [1],
+            "item_num": [1],
+            "lesson_title": ["L"],
+            "total_responses": [2],
+            "yes_count": [1],
+            "no_count": [1],
+        }
+    )
+
+
+def test_accepts_gzip_honors_q_values():
+    assert accepts_gzip("gzip")
+    assert accepts_gzip("deflate, gzip;q=0.5")
+    assert accepts_gzip("br, *")
+    assert not accepts_gzip("")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip; q=0.000, *;q=1")
+    assert not accepts_gzip("gzip;q=high")
+
+
+def test_from_data_dir_without_parsed_data(tmp_path):
+    add_id_columns(make_agg()).to_csv(tmp_path / "aggregated_feedback.csv", index=False)
+    service = FeedbackService.from_data_dir(str(tmp_path))
+    assert service.get("/courses/C/comments").status == 404
+    assert service.get("/courses/C/lessons").status == 200
+
+
+def test_from_data_dir_rejects_aggregate_without_ids(tmp_path):
+    # Aggregates written before lessons were keyed on ids have no course_id/lesson_id columns.
+    make_agg().to_csv(tmp_path / "aggregated_feedback.csv", index=False)
+    with pytest.raises(OutdatedDataError, match="sp-feedback all"):
+        FeedbackService.from_data_dir(str(tmp_path))
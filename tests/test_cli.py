@@ -0,0 +1,28 @@
+import os
+
+from src.cli import main
+
+
+def test_parse_aggregate_and_render(data_dir, capsys):
+    assert main(["parse", "--data-dir", str(data_dir)]) == 0
+    assert main(["aggregate", "--data-dir", str(data_dir)]) == 0
+    assert (data_dir / "aggregated_feedback.csv").exists()
+    assert (data_dir / "lesson_ranking.csv").exists()
+    assert (data_dir / "rollup_cube.csv").exists()
+    assert (data_dir / "alerts.csv").exists()
+
+    assert main(["render", "--data-dir", str(data_dir), "--mode", "chronological", "--jobs", "2"]) == 0
+    charts = os.listdir(data_dir / "charts")
+    assert "prealgebra-1-self-paced-chronological.png" in charts
+    assert all(name.endswith("-chronological.png") for name in charts)
+
+    # A second run skips the unchanged stages.
+    capsys.readouterr()
+    assert main(["parse", "--data-dir", str(data_dir)]) == 0
+    assert "parse: skipped" in capsys.readouterr().out
+
+
+def test_failing_stage_returns_nonzero(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SP_FEEDBACK_METRICS", "")
+    assert main(["parse", "--data-dir", str(tmp_path)]) == 1
+    assert "sp-feedback parse failed" in capsys.readouterr().err
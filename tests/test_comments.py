@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from src.comments import (
+    CommentStore,
+    count_comment_ids,
+    read_parsed_feedback,
+    store_path,
+)
+from src.parser import parse_file
+from tests.test_parser import MULTI_COURSE_SAMPLE
+
+
+def test_store_keeps_each_normalized_text_once():
+    store = CommentStore()
+    first = store.add("too  hard")
+    assert store.add(" too hard\n") == first
+    assert store.add("good") != first
+    assert len(store) == 2
+    assert store.text(first) == "too hard"
+
+
+def test_ids_ignore_case_and_are_stable_across_stores():
+    store = CommentStore()
+    first = store.add("Good  job")
+    assert store.add("good job") == first
+    # The first-seen spelling is the one shown.
+    assert store.text(first) == "Good job"
+    assert CommentStore().add("GOOD JOB") == first
+
+    # Ids from another store are not silently resolved to a different text.
+    with pytest.raises(KeyError):
+        CommentStore().text(first)
+
+
+def test_intern_and_count():
+    store = CommentStore()
+    cards = pd.DataFrame({"lesson_id": [1, 1, 2], "comments": [["good", "too hard"], ["good"], []], "x": [0, 0, 0]})
+    interned = store.intern(cards)
+    assert interned.columns.tolist() == ["lesson_id", "comment_ids", "x"]
+    assert interned["comment_ids"].iloc[2] == ""
+
+    good, too_hard = store.add("good"), store.add("too hard")
+    assert count_comment_ids(interned["comment_ids"].iloc[:2]) == [(good, 2), (too_hard, 1)]
+    assert count_comment_ids([float("nan")]) == []
+
+
+def test_parse_file_writes_comment_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("SP_FEEDBACK_METRICS", "")
+    html_path = tmp_path / "feedback_page.html"
+    html_path.write_text(MULTI_COURSE_SAMPLE.replace("</p>", "<i>good</i></p>"), encoding="utf-8")
+    parsed_csv = str(tmp_path / "parsed_feedback.csv")
+    parse_file(str(html_path), parsed_csv)
+
+    assert store_path(parsed_csv) == str(tmp_path / "parsed_feedback_comments.csv")
+    store = CommentStore.load(store_path(parsed_csv))
+    assert list(store.texts.values()) == ["good"]
+    # Every card references the same single comment, which must survive the CSV round trip exactly.
+    parsed_df = read_parsed_feedback(parsed_csv)
+    assert "comments" not in parsed_df.columns
+    assert count_comment_ids(parsed_df["comment_ids"]) == [(store.add("good"), 3)]
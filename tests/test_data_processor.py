@@ -1,6 +1,15 @@
 import pandas as pd
+import pytest
 
-from src.data_processor import aggregate_by_lesson
+from src.data_processor import (
+    aggregate_by_lesson,
+    build_lesson_ranking,
+    build_rollup_cube,
+    rollup_lookup,
+    top_worst_lessons,
+    wilson_interval,
+)
+from src.parser import add_id_columns, text_id
 
 
 def test_aggregate_by_lesson_multiple_groups():
@@ -53,3 +62,120 @@ def test_aggregate_by_lesson_multiple_groups():
     ), f"Expected total_responses {expected_total_responses_y}, got {actual_total_responses_y}"
     assert actual_yes_y == expected_yes_y, f"Expected yes_count {expected_yes_y}, got {actual_yes_y}"
     assert actual_no_y == expected_no_y, f"Expected no_count {expected_no_y}, got {actual_no_y}"
+
+
+def test_aggregate_by_lesson_confidence_intervals():
+    data = {
+        "course": ["Course A", "Course A"],
+        "chapter": ["1", "1"],
+        "section": ["1", "2"],
+        "item": ["1", "1"],
+        "lesson_title": ["Few", "Many"],
+        "num_responses": [2, 500],
+        "yes_percentage": [50, 50],
+        "no_percentage": [50, 50],
+    }
+    agg_df = aggregate_by_lesson(pd.DataFrame(data)).set_index("lesson_title")
+
+    # Both lessons are 50% "no", but the interval narrows as responses grow.
+    assert agg_df.loc["Few", "no_pct"] == agg_df.loc["Many", "no_pct"] == 50
+    for lesson in ["Few", "Many"]:
+        assert agg_df.loc[lesson, "no_ci_low"] < 50 < agg_df.loc[lesson, "no_ci_high"]
+    few_width = agg_df.loc["Few", "no_ci_high"] - agg_df.loc["Few", "no_ci_low"]
+    many_width = agg_df.loc["Many", "no_ci_high"] - agg_df.loc["Many", "no_ci_low"]
+    assert many_width < few_width
+
+
+def test_wilson_interval_edge_cases():
+    low, high = wilson_interval([0, 10, 0], [10, 10, 0])
+    assert low[0] == 0 and 0 < high[0] < 0.35
+    assert 0.65 < low[1] < 1 and high[1] == pytest.approx(1)
+    # No responses: the interval says nothing.
+    assert (low[2], high[2]) == (0, 1)
+
+
+def test_lesson_ranking_and_top_worst_lessons():
+    agg_df = pd.DataFrame(
+        {
+            "course": ["Prealgebra 1 Self-Paced", "Prealgebra 2 Self-Paced", "Introduction to Algebra A Self-Paced"]
+            * 2,
+            "chapter_num": [1, 1, 1, 2, 2, 2],
+            "section_num": [1, 1, 1, 1, 1, 1],
+            "item_num": [1, 1, 1, 1, 1, 1],
+            "lesson_title": ["Tiny", "Big Bad", "Okay", "Fine", "Course Feedback", "Bad"],
+            "yes_count": [0, 100, 90, 95, 0, 60],
+            "no_count": [1, 300, 10, 5, 50, 40],
+        }
+    )
+    add_id_columns(agg_df)
+    ranking = build_lesson_ranking(agg_df)
+
+    # Feedback lessons are excluded and the index is presorted by the interval's lower bound.
+    assert "Course Feedback" not in set(ranking["lesson_title"])
+    assert ranking["no_ci_low"].is_monotonic_decreasing
+    assert ranking["rank"].tolist() == list(range(1, 6))
+    assert set(ranking["course_family"]) == {"Prealgebra", "Introduction to Algebra"}
+
+    assert top_worst_lessons(ranking, 2)["lesson_title"].tolist() == ["Big Bad", "Bad"]
+    assert top_worst_lessons(ranking, 1, by="no_pct")["lesson_title"].tolist() == ["Tiny"]
+    assert top_worst_lessons(ranking, 2, by="no_pct", min_responses=10)["lesson_title"].tolist() == ["Big Bad", "Bad"]
+    only_algebra = top_worst_lessons(ranking, 5, families=["Introduction to Algebra"])
+    assert only_algebra["lesson_title"].tolist() == ["Bad", "Okay"]
+
+
+def test_lesson_ranking_merges_items_of_one_lesson():
+    # Two cards of one lesson (same document id) listed under different items aggregate to two rows.
+    parsed = pd.DataFrame(
+        {
+            "course": ["C", "C", "C"],
+            "chapter": ["10", "10", "10"],
+            "section": ["4", "4", "5"],
+            "item": ["2", "7", "1"],
+            "lesson_title": ["Angles in Polygons", "Angles in Polygons", "Other"],
+            "document_id": [500, 500, 501],
+            "num_responses": [56, 1, 10],
+            "yes_percentage": [50, 0, 90],
+            "no_percentage": [50, 100, 10],
+        }
+    )
+    agg_df = aggregate_by_lesson(parsed)
+    assert len(agg_df) == 3
+
+    ranking = build_lesson_ranking(agg_df).set_index("lesson_title")
+    assert ranking["lesson_id"].tolist() == [500, 501]
+    assert ranking.loc["Angles in Polygons", ["yes_count", "no_count", "responses"]].tolist() == [28, 29, 57]
+    assert ranking.loc["Angles in Polygons", "item_num"] == 2
+    assert ranking["rank"].tolist() == [1, 2]
+
+
+def test_rollup_cube_and_lookup():
+    parsed = pd.DataFrame(
+        {
+            "course": ["C"] * 5 + ["D"],
+            "chapter": ["1", "1", "1", "2", "1", "1"],
+            "section": ["1", "1", "2", "1", "3", "1"],
+            "item": ["1", "2", "1", "1", "9", "1"],
+            "lesson_title": ["A", "A", "B", "C", "Course Feedback", "A"],
+            "document_id": [1, 1, 2, 3, 4, 1],
+            "num_responses": [10, 10, 20, 5, 50, 4],
+            "yes_percentage": [50, 100, 75, 0, 0, 100],
+            "no_percentage": [50, 0, 25, 100, 100, 0],
+        }
+    )
+    cube = build_rollup_cube(aggregate_by_lesson(parsed))
+
+    # Every level holds the same totals; "Feedback" lessons are left out, as in the charts.
+    totals = cube.groupby("level")[["yes_count", "no_count", "lessons"]].sum()
+    assert (totals == totals.iloc[0]).all().all()
+    assert totals.loc["lesson"].tolist() == [34, 15, 4]
+
+    lookup = rollup_lookup(cube)
+    course_id = text_id("C")
+    assert lookup[()]["label"].tolist() == ["C", "D"]
+    chapters = lookup[(course_id,)]
+    assert chapters["label"].tolist() == ["Chapter 1", "Chapter 2"]
+    assert chapters["lessons"].tolist() == [2, 1]
+    sections = lookup[(course_id, 1)]
+    assert sections[["label", "yes_count", "no_count"]].values.tolist() == [["1.1", 15, 5], ["1.2", 15, 5]]
+    assert lookup[(course_id, 1, 1)]["label"].tolist() == ["1.1 A"]
+    assert (course_id, 1, 3) not in lookup
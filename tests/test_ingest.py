@@ -0,0 +1,67 @@
+import gzip
+
+import pandas as pd
+
+from src.ingest import export_date, ingest_exports, merge_exports, read_export
+from src.parser import add_id_columns
+from tests.test_parser import MULTI_COURSE_SAMPLE
+
+
+def test_read_export_handles_compression(tmp_path):
+    plain = tmp_path / "feedback.html"
+    plain.write_text(MULTI_COURSE_SAMPLE, encoding="utf-8")
+    compressed = tmp_path / "feedback.html.gz"
+    with gzip.open(compressed, "wt", encoding="utf-8") as f:
+        f.write(MULTI_COURSE_SAMPLE)
+    assert read_export(str(plain)) == read_export(str(compressed)) == MULTI_COURSE_SAMPLE
+
+
+def test_export_date_sources(tmp_path):
+    html = 'AoPS.bootstrap_data = {"serverTime":"2025-02-17T13:21:56-05:00"};'
+    assert export_date("feedback_2024-06-01.html", html) == "2025-02-17"
+    assert export_date("feedback_20240601.html", "") == "2024-06-01"
+
+
+def test_ingest_exports_deduplicates_by_self_paced_id(tmp_path, monkeypatch):
+    monkeypatch.setenv("SP_FEEDBACK_METRICS", "")
+    exports = tmp_path / "exports"
+    exports.mkdir()
+    (exports / "feedback_2024-01-10.html").write_text(MULTI_COURSE_SAMPLE, encoding="utf-8")
+    # A later export where the Prealgebra 2 card has more responses.
+    later = MULTI_COURSE_SAMPLE.replace(
+        "1 students responded<br>\n        100% 'yes this was helpful'; 0% 'no this was not helpful'\n      </p>\n"
+        '    </div>\n    <div class="card-footer">\n      Collection: 198',
+        "9 students responded<br>\n        100% 'yes this was helpful'; 0% 'no this was not helpful'\n      </p>\n"
+        '    </div>\n    <div class="card-footer">\n      Collection: 198',
+    )
+    assert later != MULTI_COURSE_SAMPLE
+    with gzip.open(exports / "feedback_2024-06-01.html.gz", "wt", encoding="utf-8") as f:
+        f.write(later)
+
+    output_csv = tmp_path / "history.csv"
+    merged = ingest_exports([str(exports / "*.html*")], str(output_csv), jobs=2)
+
+    # Three distinct cards across both exports; each kept from the latest export.
+    assert len(merged) == 3
+    assert merged["self_paced_id"].is_unique
+    assert set(merged["export_date"]) == {"2024-06-01"}
+    assert merged.loc[merged["self_paced_id"] == "1578", "num_responses"].item() == 9
+    assert len(pd.read_csv(output_csv)) == 3
+
+
+def test_merge_exports_without_self_paced_id():
+    frame = pd.DataFrame(
+        {
+            "course": ["C", "C"],
+            "chapter": ["1", "1"],
+            "section": ["1", "1"],
+            "item": ["1", "1"],
+            "lesson_title": ["L", "L"],
+            "self_paced_id": [None, None],
+            "num_responses": [1, 5],
+            "export_date": ["2024-01-01", "2024-02-01"],
+            "source_file": ["a.html", "b.html"],
+        }
+    )
+    merged = merge_exports([add_id_columns(frame)])
+    assert merged["num_responses"].tolist() == [5]
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from src import metrics as metrics_module
+from src.metrics import read_metrics, track_stage
+
+
+def test_track_stage_appends_jsonl_record(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    with track_stage("parse", run_id="run-1", path=path) as metrics:
+        metrics.rows = 3
+        metrics.bytes_read = 100
+    with track_stage("aggregate", run_id="run-1", path=path):
+        pass
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["stage"] for line in lines] == ["parse", "aggregate"]
+    assert lines[0]["rows"] == 3
+    assert lines[0]["bytes_read"] == 100
+    assert lines[0]["status"] == "ok"
+    assert lines[0]["run_id"] == "run-1"
+    assert lines[0]["wall_seconds"] >= 0
+
+
+def test_track_stage_records_errors_and_read_metrics_limit(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    with pytest.raises(ValueError):
+        with track_stage("render", run_id="run-2", path=path):
+            raise ValueError("boom")
+    with track_stage("render", run_id="run-3", path=path):
+        pass
+
+    records = read_metrics(path)
+    assert [r["status"] for r in records] == ["error", "ok"]
+    assert [r["run_id"] for r in read_metrics(path, limit=1)] == ["run-3"]
+
+
+def allocate_mb(size_mb: int) -> int:
+    # Filling the buffer makes its pages resident.
+    return len(b"x" * (size_mb * 1024 * 1024))
+
+
+@pytest.mark.skipif(not metrics_module.reset_peak_rss(), reason="needs a resettable RSS high-water mark (Linux)")
+def test_track_stage_records_each_stages_own_peak(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    with track_stage("outer", run_id="run-5", path=path):
+        with track_stage("big", run_id="run-5", path=path):
+            allocate_mb(200)
+        with track_stage("small", run_id="run-5", path=path):
+            allocate_mb(50)
+
+    big, small, outer = read_metrics(path)
+    # A later, smaller stage is measured on its own rather than reporting the earlier peak (or 0 growth).
+    assert small["rss_growth_kb"] >= 40 * 1024
+    assert small["stage_peak_rss_kb"] < big["stage_peak_rss_kb"]
+    assert big["rss_growth_kb"] >= 190 * 1024
+    # The outer stage keeps the peak its nested stages reached before resetting the mark.
+    assert outer["stage_peak_rss_kb"] >= big["stage_peak_rss_kb"]
+    assert small["process_peak_rss_kb"] >= big["stage_peak_rss_kb"]
+
+
+def test_track_stage_falls_back_to_the_process_peak(tmp_path, monkeypatch):
+    # Without /proc the high-water mark can't be reset, so the stage reports how far it raised the process peak.
+    monkeypatch.setattr(metrics_module, "proc_status_kb", lambda field: None)
+    readings = iter([900_000, 950_000, 950_000])
+    monkeypatch.setattr(metrics_module, "max_rss_kb", lambda: next(readings))
+    path = str(tmp_path / "metrics.jsonl")
+    with track_stage("parse", run_id="run-6", path=path):
+        pass
+    record = read_metrics(path)[0]
+    assert (record["stage_peak_rss_kb"], record["rss_growth_kb"]) == (950_000, 50_000)
+    assert record["process_peak_rss_kb"] >= 950_000
+
+
+def test_metrics_can_be_disabled(tmp_path, monkeypatch):
+    default_path = tmp_path / "data" / "metrics.jsonl"
+    monkeypatch.setattr(metrics_module, "DEFAULT_METRICS_PATH", str(default_path))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SP_FEEDBACK_METRICS", "")
+    with track_stage("parse", run_id="run-4"):
+        pass
+    assert not default_path.exists()
+    assert list(tmp_path.iterdir()) == []
@@ -1,6 +1,14 @@
 # tests/test_parser.py
 
-from src.parser import parse_feedback, parse_footer
+import pandas as pd
+
+from src.parser import (
+    FALLBACK_ID_OFFSET,
+    add_id_columns,
+    parse_feedback,
+    parse_footer,
+    text_id,
+)
 
 
 def test_parse_footer_valid():
@@ -83,3 +91,34 @@ def test_multi_course_parsing():
     # Third card should have course "Prealgebra 2 Self-Paced"
     row2 = df.iloc[2]
     assert row2["course"] == "Prealgebra 2 Self-Paced"
+
+
+def test_parse_feedback_assigns_integer_ids():
+    df = parse_feedback(MULTI_COURSE_SAMPLE)
+    assert df["lesson_id"].tolist() == [9846, 9745, 10325]
+    assert df["course_id"].tolist() == [text_id(course) for course in df["course"]]
+    assert df["course_id"].is_unique
+
+
+def test_add_id_columns_falls_back_to_position_and_title():
+    df = pd.DataFrame(
+        {
+            "course": ["C"] * 4,
+            "chapter": ["1", "1", "3", "1"],
+            "section": ["2", "2", "2", "4"],
+            "item": ["1", "2", "1", "1"],
+            "lesson_title": ["Review", "Review", "Review", "B"],
+            "document_id": [None, None, None, "7"],
+        }
+    )
+    add_id_columns(df)
+    # Cards of one lesson listed under different items share its id.
+    assert df["lesson_id"].iloc[0] == df["lesson_id"].iloc[1] == text_id("1.2 Review") + FALLBACK_ID_OFFSET
+    # A same-titled lesson in another chapter is a different lesson.
+    assert df["lesson_id"].iloc[2] == text_id("3.2 Review") + FALLBACK_ID_OFFSET
+    assert df["lesson_id"].iloc[3] == 7
+
+    # Aggregates carry the position as numbers and get the same ids.
+    agg = df.drop(columns=["chapter", "section", "item", "document_id", "lesson_id"])
+    agg = agg.assign(chapter_num=[1, 1, 3, 1], section_num=[2, 2, 2, 4])
+    assert add_id_columns(agg)["lesson_id"].tolist()[:3] == df["lesson_id"].tolist()[:3]
@@ -0,0 +1,58 @@
+import os
+import pstats
+
+from src.profiling import profile_stage, profiling_enabled
+
+
+def test_profile_stage_disabled_yields_none(tmp_path, monkeypatch):
+    monkeypatch.delenv("SP_FEEDBACK_PROFILE", raising=False)
+    with profile_stage("parse", output_dir=str(tmp_path)) as capture:
+        sum(range(100))
+    assert capture is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_profile_stage_writes_prof_and_allocation_report(tmp_path):
+    with profile_stage("aggregate", enabled=True, output_dir=str(tmp_path)) as capture:
+        data = [str(i) for i in range(10000)]
+    assert len(data) == 10000
+    assert os.path.exists(capture.prof_path)
+    assert capture.prof_path.endswith(".prof")
+    with open(capture.alloc_path, "r", encoding="utf-8") as f:
+        report = f.read()
+    assert report.startswith("Peak traced memory")
+    assert "retained at the end of the stage" in report
+
+
+def build_strings(n):
+    return [str(i) for i in range(n)]
+
+
+def read_peak_kib(alloc_path):
+    with open(alloc_path, "r", encoding="utf-8") as f:
+        return float(f.readline().split()[3])
+
+
+def test_nested_profile_stage_keeps_the_outer_profile(tmp_path):
+    with profile_stage("app_rerun", enabled=True, output_dir=str(tmp_path)) as outer:
+        big = build_strings(200000)
+        del big
+        with profile_stage("parse", enabled=True, output_dir=str(tmp_path)) as inner:
+            build_strings(10)
+
+    # The inner block doesn't start a second profiler, so the outer profile still sees calls made inside it.
+    assert inner.prof_path is None
+    assert os.path.exists(inner.alloc_path)
+    stats = pstats.Stats(outer.prof_path)
+    assert any(name == "build_strings" and calls == 2 for (_, _, name), (calls, *_) in stats.stats.items())
+    # Resetting the peak for the inner block doesn't lose the outer block's earlier peak.
+    assert read_peak_kib(outer.alloc_path) > 10 * read_peak_kib(inner.alloc_path)
+
+
+def test_profiling_enabled_reads_environment(monkeypatch):
+    monkeypatch.setenv("SP_FEEDBACK_PROFILE", "parse, render")
+    assert profiling_enabled("parse")
+    assert profiling_enabled("render")
+    assert not profiling_enabled("aggregate")
+    monkeypatch.setenv("SP_FEEDBACK_PROFILE", "all")
+    assert profiling_enabled("aggregate")
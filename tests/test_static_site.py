@@ -0,0 +1,57 @@
+import re
+
+import pandas as pd
+import pytest
+
+from src.cli import main
+from src.static_site import export_site
+
+
+@pytest.fixture
+def data_dir(data_dir):
+    """The shared data directory, parsed and aggregated."""
+    assert main(["parse", "--data-dir", str(data_dir)]) == 0
+    assert main(["aggregate", "--data-dir", str(data_dir)]) == 0
+    return data_dir
+
+
+def test_export_site_builds_pages_and_index(data_dir):
+    assert main(["export", "--data-dir", str(data_dir), "--jobs", "2"]) == 0
+    site = data_dir / "site"
+    index = (site / "index.html").read_text(encoding="utf-8")
+    # Courses follow the app's preferred order; filtered courses are left out.
+    linked = re.findall(r'href="([^"]+)\.html"', index)
+    assert linked[:3] == ["prealgebra-1-self-paced", "prealgebra-2-self-paced", "introduction-to-algebra-a-self-paced"]
+    assert not any("b2b" in slug or "teacher" in slug for slug in linked)
+
+    page = (site / "prealgebra-1-self-paced.html").read_text(encoding="utf-8")
+    for mode in ("chronological", "worst-to-best", "confidence-ranked"):
+        assert f"charts/prealgebra-1-self-paced-{mode}.png" in page
+        assert (site / "charts" / f"prealgebra-1-self-paced-{mode}.png").exists()
+    assert "<details>" in page
+
+
+def test_export_site_rebuilds_only_changed_courses(data_dir):
+    first = export_site(str(data_dir), modes=["chronological"])
+    assert set(first.values()) == {"built"}
+    assert set(export_site(str(data_dir), modes=["chronological"]).values()) == {"skipped"}
+
+    aggregated_csv = data_dir / "aggregated_feedback.csv"
+    agg_df = pd.read_csv(aggregated_csv)
+    agg_df.loc[agg_df["course"] == "Prealgebra 2 Self-Paced", "no_count"] += 1
+    agg_df = agg_df[agg_df["course"] != "Introduction to Algebra B Self-Paced"]
+    agg_df.to_csv(aggregated_csv, index=False)
+
+    statuses = export_site(str(data_dir), modes=["chronological"])
+    assert [course for course, status in statuses.items() if status == "built"] == ["Prealgebra 2 Self-Paced"]
+    assert not (data_dir / "site" / "introduction-to-algebra-b-self-paced.html").exists()
+    assert set(export_site(str(data_dir), modes=["chronological"], force=True).values()) == {"built"}
+
+
+def test_export_site_rebuilds_pages_with_missing_charts(data_dir):
+    export_site(str(data_dir), modes=["chronological"])
+    (data_dir / "site" / "charts" / "prealgebra-1-self-paced-chronological.png").unlink()
+
+    statuses = export_site(str(data_dir), modes=["chronological"])
+    assert [course for course, status in statuses.items() if status == "built"] == ["Prealgebra 1 Self-Paced"]
+    assert (data_dir / "site" / "charts" / "prealgebra-1-self-paced-chronological.png").exists()
@@ -0,0 +1,32 @@
+from src.data_processor import aggregate_by_lesson
+from src.parser import parse_feedback
+from src.synthetic import generate_feedback_page
+
+
+def test_generated_page_round_trips_through_parser():
+    html = generate_feedback_page(50, num_courses=3, max_comments_per_card=2, seed=1)
+    df = parse_feedback(html)
+
+    # Every generated card should be recognized by parse_card.
+    assert len(df) == 50
+    assert df["course"].nunique() == 3
+    assert df["self_paced_id"].notna().all()
+    assert df["self_paced_id"].is_unique
+    assert (df["yes_percentage"] + df["no_percentage"] == 100).all()
+
+    agg_df = aggregate_by_lesson(df)
+    assert agg_df["total_responses"].sum() == df["num_responses"].sum()
+
+
+def test_generated_page_repeats_lessons_and_is_deterministic():
+    html = generate_feedback_page(40, num_courses=2, lessons_per_course=5, max_comments_per_card=0, seed=7)
+    assert html == generate_feedback_page(40, num_courses=2, lessons_per_course=5, max_comments_per_card=0, seed=7)
+
+    df = parse_feedback(html)
+    lessons = df.groupby("course")[["chapter", "section", "item"]].nunique()
+    assert (lessons["item"] <= 5).all()
+    # Repeated cards of a lesson share its document id but keep their own self-paced id.
+    assert df.groupby("document_id")["self_paced_id"].nunique().eq(4).all()
+    assert df["document_id"].nunique() == 10
+    assert len(aggregate_by_lesson(df)) == 10
+    assert df["comments"].map(len).sum() == 0
@@ -1,12 +1,17 @@
 import pandas as pd
 
-from streamlit_app.utils import (
+from src.comments import CommentStore
+from src.data_processor import aggregate_by_lesson
+from src.parser import add_id_columns
+from src.views import (
     build_course_display_map,
     clean_course_name,
     combine_comment_lists,
     filter_courses,
+    prepare_comments_view,
     sort_course_display_names,
 )
+from streamlit_app.utils import summarize_metrics
 
 
 def test_filter_courses():
@@ -71,3 +76,107 @@ def test_combine_comment_lists():
     combined = combine_comment_lists(series)
     expected = ["I love math", "Math is fun", "I enjoy challenges"]
     assert combined == expected
+
+
+def test_prepare_comments_view_keeps_same_titled_lessons_apart():
+    # "Review" appears in two courses and twice in course A (different documents); none of them may be merged.
+    parsed_df = pd.DataFrame(
+        {
+            "course": ["A", "A", "B"],
+            "chapter": ["1", "2", "1"],
+            "section": ["1", "1", "1"],
+            "item": ["1", "1", "1"],
+            "lesson_title": ["Review", "Review", "Review"],
+            "document_id": [10, 20, 10],
+            "num_responses": [10, 10, 10],
+            "yes_percentage": [100, 0, 50],
+            "no_percentage": [0, 100, 50],
+            "comments": ["['a1']", "['a2']", "['b']"],
+        }
+    )
+    add_id_columns(parsed_df)
+    merged = prepare_comments_view(parsed_df, aggregate_by_lesson(parsed_df), "A", "worst-to-best")
+    assert merged["comments"].tolist() == [["a2"], ["a1"]]
+    assert merged["no_pct"].tolist() == [100, 0]
+
+    # Without document ids they are still told apart by chapter and section.
+    parsed_df = add_id_columns(parsed_df.drop(columns=["document_id", "course_id", "lesson_id"]))
+    merged = prepare_comments_view(parsed_df, aggregate_by_lesson(parsed_df), "A", "worst-to-best")
+    assert merged["comments"].tolist() == [["a2"], ["a1"]]
+
+
+def test_prepare_comments_view_counts_repeated_comments():
+    parsed_df = pd.DataFrame(
+        {
+            "course": ["A", "A"],
+            "chapter": ["1", "1"],
+            "section": ["1", "1"],
+            "item": ["1", "2"],
+            "lesson_title": ["Review", "Review"],
+            "document_id": [10, 10],
+            "num_responses": [10, 10],
+            "yes_percentage": [50, 50],
+            "no_percentage": [50, 50],
+            "comments": [["good", "too hard"], ["good"]],
+        }
+    )
+    add_id_columns(parsed_df)
+    agg_df = aggregate_by_lesson(parsed_df)
+    expected = (["good", "too hard"], [2, 1])
+
+    store = CommentStore()
+    merged = prepare_comments_view(store.intern(parsed_df), agg_df, "A", "chronological", store)
+    assert (merged["comments"].iloc[0], merged["comment_counts"].iloc[0]) == expected
+
+    # Older parsed data holds stringified comment lists instead of ids.
+    merged = prepare_comments_view(parsed_df.assign(comments=parsed_df["comments"].astype(str)), agg_df, "A", "")
+    assert (merged["comments"].iloc[0], merged["comment_counts"].iloc[0]) == expected
+
+    # Parsed data written before lessons were keyed on ids gets its ids on the fly.
+    legacy = parsed_df.drop(columns=["course_id", "lesson_id"]).assign(comments=parsed_df["comments"].astype(str))
+    merged = prepare_comments_view(legacy, agg_df, "A", "")
+    assert (merged["comments"].iloc[0], merged["comment_counts"].iloc[0]) == expected
+
+
+def test_summarize_metrics():
+    records = [
+        {
+            "stage": "parse",
+            "wall_seconds": 2.0,
+            "rows": 10,
+            "bytes_read": 100,
+            "bytes_written": 50,
+            "rss_growth_kb": 2048,
+            "stage_peak_rss_kb": 3072,
+        },
+        {
+            "stage": "parse",
+            "wall_seconds": 4.0,
+            "rows": 12,
+            "bytes_read": 120,
+            "bytes_written": 60,
+            "rss_growth_kb": 1024,
+            "stage_peak_rss_kb": 4096,
+        },
+        {
+            "stage": "aggregate",
+            "wall_seconds": 1.0,
+            "rows": 12,
+            "bytes_read": 60,
+            "bytes_written": 30,
+            "rss_growth_kb": 512,
+            "stage_peak_rss_kb": 1024,
+        },
+    ]
+    summary = summarize_metrics(records).set_index("stage")
+    assert summary.loc["parse", "runs"] == 2
+    assert summary.loc["parse", "last_seconds"] == 4.0
+    assert summary.loc["parse", "mean_seconds"] == 3.0
+    assert summary.loc["parse", "last_rows"] == 12
+    assert summary.loc["parse", "max_rss_growth_mb"] == 2.0
+    assert summary.loc["parse", "peak_rss_mb"] == 4.0
+    assert summary.loc["aggregate", "runs"] == 1
+    assert summarize_metrics([]).empty
+    # Records written before memory growth was measured still summarize.
+    legacy = summarize_metrics([{k: v for k, v in records[2].items() if k != "rss_growth_kb"}])
+    assert legacy["max_rss_growth_mb"].isna().all()
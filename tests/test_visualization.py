@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
 
+from src.parser import add_id_columns
 from src.visualization import sort_and_label_lessons
 
 
@@ -17,7 +18,7 @@ def sample_course_df():
         "yes_percentage": [50, 60, 70, 80, 90],
         "no_percentage": [50, 40, 30, 20, 10],
     }
-    df = pd.DataFrame(data)
+    df = add_id_columns(pd.DataFrame(data))
     # Simulate numeric conversion as in the data_processor.
     df["chapter_num"] = df["chapter"].astype(int)
     df["section_num"] = df["section"].astype(int)
@@ -58,3 +59,24 @@ def test_sort_and_label_worst_to_best(sample_course_df):
     # Check that lesson_label includes a '%' symbol indicating the no_pct value.
     for label in grouped["lesson_label"]:
         assert "%" in label, f"Expected '%' in lesson label, got '{label}'"
+
+
+def test_sort_and_label_confidence_ranked():
+    # A lesson with 2 responses at 100% "no" should not outrank one with 500 responses at 60% "no".
+    df = pd.DataFrame(
+        {
+            "course": ["Test Course"] * 2,
+            "chapter_num": [1, 1],
+            "section_num": [1, 2],
+            "lesson_title": ["Tiny", "Big"],
+            "yes_count": [0, 200],
+            "no_count": [2, 300],
+        }
+    )
+    add_id_columns(df)
+    assert sort_and_label_lessons(df, mode="worst-to-best").iloc[0]["lesson_title"] == "Tiny"
+
+    grouped = sort_and_label_lessons(df, mode="confidence-ranked")
+    assert grouped["lesson_title"].tolist() == ["Big", "Tiny"]
+    assert grouped["no_ci_low"].is_monotonic_decreasing
+    assert all("% no)" in label for label in grouped["lesson_label"])